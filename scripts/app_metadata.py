@@ -0,0 +1,49 @@
+# scripts/app_metadata.py
+from datetime import datetime
+from pathlib import Path
+import json
+import os
+
+APP_METADATA_PATH = "data/raw/app_metadata.json"
+
+# Store-listing fields that move when an app gains, loses or re-rates reviews
+SIGNATURE_FIELDS = ("reviews", "ratings", "histogram", "updated", "version")
+# Apps are scraped at least this often however unchanged their metadata looks,
+# since text-only review edits leave every signature field as it was
+MAX_SKIP_HOURS = 24
+
+def signature(details):
+    """The SIGNATURE_FIELDS of an app's details, as returned by google_play_scraper.app()"""
+    return {field: details.get(field) for field in SIGNATURE_FIELDS}
+
+def load_app_metadata(path=APP_METADATA_PATH):
+    """Load {app_id: {"signature": ..., "scraped_at": iso}} of the last scrape of each app"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_app_metadata(metadata, path=APP_METADATA_PATH):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(metadata, f, indent=2)
+    os.replace(tmp_path, path)
+
+def record_metadata(metadata, app_id, current, now=None):
+    """Remember the signature an app had when it was last scraped"""
+    now = now or datetime.now()
+    metadata[app_id] = {"signature": current, "scraped_at": now.isoformat()}
+    return metadata[app_id]
+
+def is_unchanged(entry, current, now=None):
+    """True when an app's metadata matches its last scrape and that scrape is recent
+
+    The signature is fetched before the app's reviews are paged, so a review
+    posted while paging changes the next signature rather than being missed.
+    """
+    if entry is None:
+        return False
+    now = now or datetime.now()
+    hours = (now - datetime.fromisoformat(entry["scraped_at"])).total_seconds() / 3600
+    return hours < MAX_SKIP_HOURS and entry["signature"] == current
@@ -0,0 +1,108 @@
+# scripts/app_registry.py
+from datetime import datetime
+from pathlib import Path
+import json
+import math
+import os
+
+REGISTRY_PATH = "config/apps.json"
+SCHEDULE_STATE_PATH = "data/raw/schedule_state.json"
+
+# Weight of the latest observation in the new-review velocity average
+VELOCITY_ALPHA = 0.3
+# Assumed new reviews/hour before an app has two scrapes to measure it
+INITIAL_VELOCITY = 1.0
+# An app is due once at least this many new reviews are expected
+MIN_EXPECTED_REVIEWS = 1.0
+# Apps are polled at least this often, however dormant they look
+MAX_INTERVAL_HOURS = 7 * 24
+
+# Review source of registry entries without a "source" field
+DEFAULT_SOURCE = "play"
+
+def _load_entries(path):
+    with open(path, encoding="utf-8") as f:
+        return [entry for entry in json.load(f) if entry.get("enabled", True)]
+
+def load_registry(path=REGISTRY_PATH, source=DEFAULT_SOURCE):
+    """Load the tracked apps of one source as {name: app_id}, skipping disabled entries"""
+    return {
+        entry["bank"]: entry["app_id"]
+        for entry in _load_entries(path)
+        if entry.get("source", DEFAULT_SOURCE) == source
+    }
+
+def load_sources(path=REGISTRY_PATH):
+    """Load the tracked apps of every source as {source: {name: app_id}}"""
+    sources = {}
+    for entry in _load_entries(path):
+        sources.setdefault(entry.get("source", DEFAULT_SOURCE), {})[entry["bank"]] = entry["app_id"]
+    return sources
+
+def load_schedule_state(path=SCHEDULE_STATE_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_schedule_state(state, path=SCHEDULE_STATE_PATH):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+def record_scrape(state, app_id, new_reviews, now=None):
+    """Fold one incremental scrape into the app's velocity (new reviews/hour)"""
+    now = now or datetime.now()
+    entry = state.get(app_id)
+    if entry is None:
+        # First observation has no interval to divide by; start from the prior
+        state[app_id] = {"last_scraped": now.isoformat(), "velocity": INITIAL_VELOCITY}
+        return state[app_id]
+
+    hours = max((now - datetime.fromisoformat(entry["last_scraped"])).total_seconds() / 3600, 1 / 60)
+    observed = new_reviews / hours
+    entry["velocity"] = VELOCITY_ALPHA * observed + (1 - VELOCITY_ALPHA) * entry["velocity"]
+    entry["last_scraped"] = now.isoformat()
+    return entry
+
+def _estimate(entry, now):
+    """(expected new reviews, staleness hours) of one app"""
+    hours = (now - datetime.fromisoformat(entry["last_scraped"])).total_seconds() / 3600
+    return entry["velocity"] * hours, hours
+
+def plan_scrape(apps, state, request_budget, page_size, streams=1, metadata_requests=0, now=None):
+    """Pick the apps worth polling now within a request budget
+
+    Never-scraped apps and apps older than MAX_INTERVAL_HOURS come first.
+    The rest are due once MIN_EXPECTED_REVIEWS new reviews are expected
+    (velocity x staleness) and ranked by that expectation, so busy apps are
+    polled often and dormant ones rarely. Each of an app's streams (locale
+    x rating bucket) is charged one request plus one per expected page of
+    page_size new reviews, on top of its metadata_requests. Returns a
+    {name: app_id} subset in priority order.
+    """
+    now = now or datetime.now()
+    ranked = []
+    for name, app_id in apps.items():
+        entry = state.get(app_id)
+        if entry is None:
+            ranked.append((math.inf, metadata_requests + streams, name, app_id))
+            continue
+        expected, hours = _estimate(entry, now)
+        cost = metadata_requests + streams * (1 + math.ceil(expected / page_size))
+        priority = math.inf if hours >= MAX_INTERVAL_HOURS else expected
+        ranked.append((priority, cost, name, app_id))
+
+    ranked.sort(key=lambda item: item[0], reverse=True)
+    selected = {}
+    spent = 0
+    for priority, cost, name, app_id in ranked:
+        if priority < MIN_EXPECTED_REVIEWS:
+            break
+        if spent + cost > request_budget:
+            continue
+        selected[name] = app_id
+        spent += cost
+    return selected
@@ -0,0 +1,116 @@
+# scripts/benchmark_decoder.py
+from datetime import datetime
+from pathlib import Path
+import argparse
+import json
+import random
+import time
+import google_play_scraper.features.reviews as reviews_feature
+from google_play_scraper import reviews
+from fetch_backends import _token_state
+from page_decoder import decode_page
+from scraper import _page_table
+
+# Reviews per synthetic page; one request of google_play_scraper.reviews()
+SYNTHETIC_PAGE_SIZE = 199
+
+def synthetic_payload(page_index, size=SYNTHETIC_PAGE_SIZE, seed=0):
+    """A batchexecute reviews response shaped like Play's, for runs without fixtures"""
+    rng = random.Random(seed + page_index)
+    base = int(datetime(2025, 1, 1).timestamp()) - page_index * size * 60
+    items = []
+    for i in range(size):
+        at = base - i * 60
+        reply = None
+        if rng.random() < 0.3:
+            reply = [None, "Dear customer, thank you for your feedback. " * rng.randint(1, 4), [at + 3600, 0]]
+        items.append([
+            f"gp:AOqpTO{page_index:05d}{i:04d}",
+            [f"User {i}", [None, 2, None, [None, None, f"https://play-lh.googleusercontent.com/a/{i}"]]],
+            rng.randint(1, 5),
+            None,
+            "The app keeps crashing when I transfer money " * rng.randint(1, 8),
+            [at, 0],
+            rng.randint(0, 50),
+            reply,
+            None,
+            None,
+            "5.2.1",
+        ])
+    inner = json.dumps([items, None, None, [None, f"token-{page_index + 1}"]])
+    envelope = json.dumps([["wrb.fr", "UsvDTd", inner, None, None, None, "generic"], ["di", 120]])
+    return f")]}}'\n\n{envelope}"
+
+def load_payloads(fixture_dir):
+    """Raw payloads of fixtures recorded with --record (FastPlayBackend)"""
+    payloads = []
+    for path in sorted(Path(fixture_dir).glob("*.json")):
+        with open(path, encoding="utf-8") as f:
+            fixture = json.load(f)
+        if fixture.get("payload"):
+            payloads.append(fixture["payload"])
+    return payloads
+
+def library_path(payload, count):
+    """Current path: google_play_scraper.reviews() on the payload, then the page table"""
+    reviews_feature.post = lambda url, data, headers: payload
+    page, token = reviews("bench.app", lang="en", country="et", count=max(count, 1))
+    _token_state(token)
+    return _page_table("Bench", "bench.app", ("en", "et"), page)
+
+def columnar_path(payload, count):
+    """Fast path: page_decoder straight into columns, then the page table"""
+    page, _ = decode_page(payload)
+    return _page_table("Bench", "bench.app", ("en", "et"), page)
+
+def measure(fn, payloads, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for payload, count in payloads:
+            fn(payload, count)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark review page decoding on recorded or synthetic payloads")
+    parser.add_argument("--fixtures", metavar="DIR", help="fixtures recorded by scraper.py --record")
+    parser.add_argument("--pages", type=int, default=200, help="synthetic pages when no fixtures are given")
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs; the fastest is reported")
+    parser.add_argument("--json", metavar="PATH", help="also write results as JSON")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    payloads = load_payloads(args.fixtures) if args.fixtures else [synthetic_payload(i) for i in range(args.pages)]
+    if not payloads:
+        raise SystemExit(f"No fixtures with raw payloads in {args.fixtures}; record them with --record")
+    # The library pages until count reviews arrive, so it is asked for exactly one page's worth
+    payloads = [(payload, len(decode_page(payload)[0])) for payload in payloads]
+    reviews_total = sum(count for _, count in payloads)
+    original_post = reviews_feature.post
+
+    # Both paths must produce the same rows before their speed means anything
+    for payload, count in payloads[:5]:
+        if not library_path(payload, count).equals(columnar_path(payload, count)):
+            raise SystemExit("Columnar decoder output differs from google_play_scraper's")
+
+    results = []
+    for name, fn in (("library", library_path), ("columnar", columnar_path)):
+        seconds = measure(fn, payloads, args.repeat)
+        results.append({
+            "path": name,
+            "pages": len(payloads),
+            "seconds": round(seconds, 4),
+            "ms_per_page": round(seconds / len(payloads) * 1000, 3),
+            "reviews_per_sec": round(reviews_total / seconds),
+        })
+    reviews_feature.post = original_post
+
+    print(f"{'path':<10}{'pages':>7}{'ms/page':>10}{'reviews/s':>12}")
+    for r in results:
+        print(f"{r['path']:<10}{r['pages']:>7}{r['ms_per_page']:>10}{r['reviews_per_sec']:>12}")
+    print(f"speedup: {results[0]['seconds'] / results[1]['seconds']:.2f}x")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,101 @@
+# scripts/benchmark_raw_store.py
+from datetime import datetime, timedelta
+from pathlib import Path
+import argparse
+import json
+import tempfile
+import time
+import pandas as pd
+import pyarrow as pa
+from preprocess import RAW_COLUMNS
+from raw_store import RAW_SCHEMA, RawReviewSink, compact_store, iter_raw_chunks, read_raw
+
+# Real review texts cycled through the benchmark rows
+REVIEWS_CSV = "data/processed/reviews_clean.csv"
+# Columns of the data/raw/reviews_raw.csv the scraper used to write
+LEGACY_CSV_COLUMNS = ["bank", "review", "rating", "date", "source"]
+
+def benchmark_table(rows, texts, start=datetime(2025, 1, 1), spacing=timedelta(hours=3)):
+    """RAW_SCHEMA table of rows reviews cycling through texts, newest first"""
+    ats = [start - i * spacing for i in range(rows)]
+    return pa.Table.from_pydict({
+        "review_id": [f"gp:bench{i:08d}" for i in range(rows)],
+        "bank": [texts["bank"][i % len(texts)] for i in range(rows)],
+        "app_id": [f"app.{texts['bank'][i % len(texts)]}" for i in range(rows)],
+        "review": [texts["review"][i % len(texts)] for i in range(rows)],
+        "rating": [int(texts["rating"][i % len(texts)]) for i in range(rows)],
+        "date": [at.date() for at in ats],
+        "at": ats,
+        "thumbs_up": [i % 17 for i in range(rows)],
+        "review_created_version": ["5.2.1"] * rows,
+        "reply_content": [None] * rows,
+        "replied_at": [None] * rows,
+        "lang": ["en"] * rows,
+        "country": ["et"] * rows,
+        "source": ["Google Play"] * rows,
+    }, schema=RAW_SCHEMA)
+
+def size_of(path):
+    path = Path(path)
+    if path.is_file():
+        return path.stat().st_size
+    return sum(file.stat().st_size for file in path.rglob("*.parquet"))
+
+def measure(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compare the raw store's size and read time with plain CSV")
+    parser.add_argument("--rows", type=int, default=8760, help="reviews written to each format")
+    parser.add_argument("--pages", type=int, default=50, help="sink writes (pages) the rows are split into")
+    parser.add_argument("--reviews", default=REVIEWS_CSV, help="CSV whose bank, review and rating columns are cycled")
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs; the fastest is reported")
+    parser.add_argument("--json", metavar="PATH", help="also write results as JSON")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    texts = pd.read_csv(args.reviews).dropna(subset=["review"]).reset_index(drop=True)
+    table = benchmark_table(args.rows, texts)
+
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        root = directory / "reviews"
+        page_rows = max(1, -(-args.rows // args.pages))
+        for start in range(0, args.rows, page_rows):
+            # One run per page, as a worst case of many small incremental scrapes
+            with RawReviewSink(root) as sink:
+                sink.write(table.slice(start, page_rows))
+        compact_store(root)
+        full_csv = directory / "reviews_raw_full.csv"
+        legacy_csv = directory / "reviews_raw.csv"
+        frame = table.to_pandas()
+        frame.to_csv(full_csv, index=False)
+        frame[LEGACY_CSV_COLUMNS].to_csv(legacy_csv, index=False)
+
+        results = []
+        for name, path, read in (
+            ("raw store, all columns", root, lambda: read_raw(root)),
+            ("CSV, all columns", full_csv, lambda: pd.read_csv(full_csv)),
+            ("raw store, preprocess chunks", root, lambda: sum(len(c) for c in iter_raw_chunks(root, RAW_COLUMNS))),
+            ("CSV, original reviews_raw.csv", legacy_csv, lambda: pd.read_csv(legacy_csv)),
+        ):
+            seconds = measure(read, args.repeat)
+            results.append({"format": name, "bytes": size_of(path), "read_seconds": round(seconds, 4)})
+        part_files = len(list(root.rglob("*.parquet")))
+
+    print(f"{args.rows} reviews written in {args.pages} runs, compacted into {part_files} part files")
+    print(f"{'format':<32}{'MB':>8}{'read ms':>10}")
+    for r in results:
+        print(f"{r['format']:<32}{r['bytes'] / 1e6:>8.3f}{r['read_seconds'] * 1000:>10.1f}")
+    for store, csv in ((results[0], results[1]), (results[2], results[3])):
+        print(f"{store['format']} vs {csv['format']}: {csv['bytes'] / store['bytes']:.1f}x smaller, "
+              f"{csv['read_seconds'] / store['read_seconds']:.1f}x faster to read")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,119 @@
+# scripts/benchmark_scraper.py
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import argparse
+import json
+import multiprocessing
+import resource
+import tempfile
+import threading
+import time
+from fetch_backends import SimulatedBackend
+from rate_limiter import TokenBucketLimiter
+
+# Scraper configurations compared by the benchmark
+MODES = {
+    "sequential": {"max_workers": 1, "per_app_concurrency": 1, "partition_by_rating": False},
+    "concurrent": {"max_workers": 8, "per_app_concurrency": 1, "partition_by_rating": False},
+    "partitioned": {"max_workers": 8, "per_app_concurrency": 5, "partition_by_rating": True},
+}
+
+class NullSink:
+    """Sink that only counts rows, so the benchmark measures scraping alone"""
+
+    def __init__(self):
+        self.run_id = "benchmark"
+        self.rows = 0
+        self.pages = 0
+        self._lock = threading.Lock()
+
+    def write(self, records):
+        with self._lock:
+            self.rows += len(records)
+            self.pages += 1
+
+    def on_commit(self, callback):
+        callback()
+
+def run_mode(mode, apps, page_size, backend_options, limiter_options, sink_kind):
+    """Scrape every app once in a fresh process and return its measurements"""
+    import scraper
+    from raw_store import RawReviewSink
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        scraper.PAGE_SIZE = page_size
+        scraper.CHECKPOINT_DIR = f"{tmp_dir}/checkpoints"
+        backend = SimulatedBackend(**backend_options)
+        sink = NullSink() if sink_kind == "null" else RawReviewSink(f"{tmp_dir}/reviews")
+        apps = {f"App{i}": f"sim.app{i}" for i in range(apps)}
+
+        started = time.perf_counter()
+        scraper.scrape_reviews(
+            sink,
+            apps=apps,
+            locales=[("en", "et")],
+            backend=backend,
+            limiter_factory=partial(TokenBucketLimiter, **limiter_options),
+            **MODES[mode]
+        )
+        if sink_kind != "null":
+            sink.close()
+        elapsed = time.perf_counter() - started
+
+    stats = scraper.limiter_stats().values()
+    return {
+        "mode": mode,
+        "seconds": round(elapsed, 3),
+        "reviews": sink.rows,
+        "pages": backend.requests - backend.throttled,
+        "reviews_per_sec": round(sink.rows / elapsed, 1),
+        "pages_per_sec": round((backend.requests - backend.throttled) / elapsed, 2),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "retries": sum(s["retries"] for s in stats),
+        "throttles": sum(s["throttles"] for s in stats),
+    }
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark scraper modes against a simulated Play store")
+    parser.add_argument("--modes", default=",".join(MODES), help="comma-separated modes to run")
+    parser.add_argument("--apps", type=int, default=3, help="number of simulated apps")
+    parser.add_argument("--reviews-per-app", type=int, default=5_000)
+    parser.add_argument("--page-size", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05, help="mean seconds per request")
+    parser.add_argument("--latency-dist", choices=["fixed", "exponential", "lognormal"], default="lognormal")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="probability a request gets a 429")
+    parser.add_argument("--max-rps", type=float, default=None, help="simulated store-wide requests/sec ceiling")
+    parser.add_argument("--rate", type=float, default=5.0, help="initial limiter rate per app")
+    parser.add_argument("--max-rate", type=float, default=50.0, help="limiter rate ceiling per app")
+    parser.add_argument("--sink", choices=["null", "parquet"], default="null",
+                        help="discard rows or write them to a temporary Parquet store")
+    parser.add_argument("--json", metavar="PATH", help="also write results as JSON")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    backend_options = {
+        "reviews_per_app": args.reviews_per_app,
+        "latency": args.latency,
+        "latency_dist": args.latency_dist,
+        "throttle_rate": args.throttle_rate,
+        "max_rps": args.max_rps,
+    }
+    limiter_options = {"rate": args.rate, "max_rate": args.max_rate, "base_backoff": 0.1, "max_retries": 20}
+
+    results = []
+    # Each mode runs in its own spawned process so peak RSS is per mode
+    context = multiprocessing.get_context("spawn")
+    for mode in args.modes.split(","):
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            results.append(pool.submit(
+                run_mode, mode, args.apps, args.page_size, backend_options, limiter_options, args.sink
+            ).result())
+
+    print(f"{'mode':<12}{'seconds':>9}{'reviews/s':>11}{'pages/s':>9}{'peak MB':>9}{'retries':>9}{'throttles':>10}")
+    for r in results:
+        print(f"{r['mode']:<12}{r['seconds']:>9}{r['reviews_per_sec']:>11}{r['pages_per_sec']:>9}"
+              f"{r['peak_rss_mb']:>9}{r['retries']:>9}{r['throttles']:>10}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,334 @@
+# scripts/fetch_backends.py
+from datetime import datetime
+from pathlib import Path
+import hashlib
+import inspect
+import json
+import math
+import os
+import random
+import threading
+import time
+from google_play_scraper import Sort, app, reviews
+from google_play_scraper.constants.request import Formats
+from google_play_scraper.features.reviews import MAX_COUNT_EACH_FETCH, _ContinuationToken
+from google_play_scraper.utils.request import post
+from app_metadata import signature
+from http_pool import DEFAULT_POOL_SIZE, install_pool, pooled_post
+from page_decoder import decode_page
+
+# Review fields holding datetimes, stored as ISO strings in fixtures
+DATETIME_FIELDS = ("at", "repliedAt")
+
+def _token_state(token):
+    """JSON-serialisable snapshot of a continuation token, None at the end"""
+    if token is None or token.token is None:
+        return None
+    return {slot: getattr(token, slot, None) for slot in type(token).__slots__}
+
+def _restore_token(state):
+    token = _ContinuationToken.__new__(_ContinuationToken)
+    for slot in _ContinuationToken.__slots__:
+        setattr(token, slot, state.get(slot))
+    return token
+
+def encode_review(review):
+    return {k: v.isoformat() if isinstance(v, datetime) else v for k, v in review.items()}
+
+def decode_review(review):
+    for key in DATETIME_FIELDS:
+        if review.get(key):
+            review[key] = datetime.fromisoformat(review[key])
+    return review
+
+class PlayBackend:
+    """Live Google Play backend
+
+    Every backend exposes fetch_page(app_id, lang, country, score, count,
+    token) returning (reviews, next_token), where tokens are plain
+    JSON-serialisable dicts (or None once the stream is exhausted) so they
+    can be checkpointed and recorded, and fetch_app_metadata(app_id, lang,
+    country) returning the app's app_metadata.signature. Review requests go
+    through the shared keep-alive connection pool unless pool_size is 0.
+    """
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE):
+        self.pool = install_pool(pool_size) if pool_size else None
+
+    def fetch_page(self, app_id, lang, country, score, count, token=None):
+        page, next_token = reviews(
+            app_id,
+            lang=lang,
+            country=country,
+            sort=Sort.NEWEST,
+            count=count,
+            filter_score_with=score,
+            continuation_token=_restore_token(token) if token else None
+        )
+        return page, _token_state(next_token)
+
+    def fetch_app_metadata(self, app_id, lang, country):
+        return signature(app(app_id, lang=lang, country=country))
+
+_BUILD_BODY_PARAMETERS = inspect.signature(Formats.Reviews.build_body).parameters
+
+def _reviews_body(app_id, count, score, pagination_token):
+    """Request body google_play_scraper.reviews() would send for this page"""
+    options = {
+        "app_id": app_id,
+        "sort": Sort.NEWEST,
+        "count": count,
+        "filter_score_with": "null" if score is None else score,
+        "pagination_token": pagination_token,
+    }
+    if "filter_device_with" in _BUILD_BODY_PARAMETERS:
+        # Newer library versions can also filter by device type
+        options["filter_device_with"] = "null"
+    return Formats.Reviews.build_body(**options)
+
+class FastPlayBackend(PlayBackend):
+    """Live Google Play backend decoding raw payloads straight into columns
+
+    Sends the same request as google_play_scraper.reviews(), but decodes
+    the response with page_decoder.decode_page, which reads only the kept
+    fields into a columnar ReviewPage instead of one dict per review (with
+    every field) per review. Tokens are the same dicts PlayBackend returns,
+    so checkpoints work with either backend.
+    """
+
+    def fetch_raw(self, app_id, lang, country, score, count, token=None):
+        """Raw response text of one reviews page"""
+        send = pooled_post if self.pool is not None else post
+        return send(
+            Formats.Reviews.build(lang=lang, country=country),
+            _reviews_body(app_id, min(count, MAX_COUNT_EACH_FETCH), score, token["token"] if token else None),
+            {"content-type": "application/x-www-form-urlencoded"}
+        )
+
+    @staticmethod
+    def decode(payload, lang, country, score, count):
+        """(ReviewPage, token dict or None) of a raw response"""
+        page, next_token = decode_page(payload)
+        if next_token is None:
+            return page, None
+        state = {"token": next_token, "lang": lang, "country": country, "sort": Sort.NEWEST,
+                 "count": min(count, MAX_COUNT_EACH_FETCH), "filter_score_with": score}
+        return page, {slot: state.get(slot) for slot in _ContinuationToken.__slots__}
+
+    def fetch_page(self, app_id, lang, country, score, count, token=None):
+        return self.decode(self.fetch_raw(app_id, lang, country, score, count, token), lang, country, score, count)
+
+def _fixture_key(app_id, lang, country, score, count, token):
+    request = {
+        "app_id": app_id,
+        "lang": lang,
+        "country": country,
+        "score": score,
+        "count": count,
+        "token": token["token"] if token else None
+    }
+    return hashlib.sha1(json.dumps(request, sort_keys=True).encode("utf-8")).hexdigest(), request
+
+def _metadata_fixture_name(app_id, lang, country):
+    return f"metadata-{app_id}-{lang}-{country}.json"
+
+class RecordingBackend:
+    """Pass-through backend that saves every fetched page as a JSON fixture
+
+    When the inner backend exposes fetch_raw (FastPlayBackend), the raw
+    response payload is saved too, so replays and decoder benchmarks run
+    on exactly what Play returned.
+    """
+
+    def __init__(self, fixture_dir, inner=None):
+        self.fixture_dir = Path(fixture_dir)
+        self.fixture_dir.mkdir(parents=True, exist_ok=True)
+        self.inner = inner or FastPlayBackend()
+
+    def fetch_page(self, app_id, lang, country, score, count, token=None):
+        payload = None
+        if hasattr(self.inner, "fetch_raw"):
+            payload = self.inner.fetch_raw(app_id, lang, country, score, count, token)
+            page, next_token = self.inner.decode(payload, lang, country, score, count)
+        else:
+            page, next_token = self.inner.fetch_page(app_id, lang, country, score, count, token)
+        key, request = _fixture_key(app_id, lang, country, score, count, token)
+        path = self.fixture_dir / f"{key}.json"
+        tmp_path = path.with_suffix(".json.tmp")
+        fixture = {"request": request, "reviews": [encode_review(review) for review in page], "next_token": next_token}
+        if payload is not None:
+            fixture["payload"] = payload
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(fixture, f)
+        os.replace(tmp_path, path)
+        return page, next_token
+
+    def fetch_app_metadata(self, app_id, lang, country):
+        metadata = self.inner.fetch_app_metadata(app_id, lang, country)
+        path = self.fixture_dir / _metadata_fixture_name(app_id, lang, country)
+        tmp_path = path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"request": {"app_id": app_id, "lang": lang, "country": country}, "metadata": metadata}, f)
+        os.replace(tmp_path, path)
+        return metadata
+
+class SimulatedHTTPError(Exception):
+    """Error injected by simulated backends; carries an HTTP status like urllib's HTTPError"""
+
+    def __init__(self, code):
+        super().__init__(f"Simulated HTTP error. Status code {code} returned.")
+        self.code = code
+
+class ReplayBackend:
+    """Serve recorded fixtures offline with simulated latency and errors
+
+    latency is the mean seconds per page (exponentially distributed when
+    jitter is set), and error_rate the probability that a request fails
+    with one of error_codes instead of returning its page. A seed makes the
+    injected latency and errors deterministic.
+    """
+
+    def __init__(self, fixture_dir, latency=0.0, jitter=False, error_rate=0.0,
+                 error_codes=(429, 503), seed=None):
+        self.fixture_dir = Path(fixture_dir)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_codes = error_codes
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _simulate_request(self):
+        with self._lock:
+            delay = self._random.expovariate(1 / self.latency) if self.jitter and self.latency else self.latency
+            fail = self._random.random() < self.error_rate
+            code = self._random.choice(self.error_codes)
+        if delay:
+            time.sleep(delay)
+        if fail:
+            raise SimulatedHTTPError(code)
+
+    def fetch_page(self, app_id, lang, country, score, count, token=None):
+        self._simulate_request()
+        key, request = _fixture_key(app_id, lang, country, score, count, token)
+        path = self.fixture_dir / f"{key}.json"
+        if not path.exists():
+            raise FileNotFoundError(f"No recorded page for {request} in {self.fixture_dir}")
+        with open(path, encoding="utf-8") as f:
+            fixture = json.load(f)
+        if "payload" in fixture:
+            return decode_page(fixture["payload"])[0], fixture["next_token"]
+        return [decode_review(review) for review in fixture["reviews"]], fixture["next_token"]
+
+    def fetch_app_metadata(self, app_id, lang, country):
+        self._simulate_request()
+        path = self.fixture_dir / _metadata_fixture_name(app_id, lang, country)
+        if not path.exists():
+            raise FileNotFoundError(f"No recorded metadata for {app_id} ({lang}-{country}) in {self.fixture_dir}")
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)["metadata"]
+
+class SimulatedBackend:
+    """Synthetic Play store for benchmarks: no fixtures, no network
+
+    Each app holds reviews_per_app deterministic reviews (newest first) and
+    serves them in pages, honouring score filters and continuation tokens.
+    Per-request latency is drawn from latency_dist ("fixed", "exponential"
+    or "lognormal") around latency seconds. Requests fail with a 429 with
+    probability throttle_rate, and also whenever max_rps (if set) is
+    exceeded, which lets adaptive limiters find the ceiling.
+    """
+
+    # Share of reviews per star rating 1..5, in percent
+    SCORE_WEIGHTS = (10, 5, 10, 20, 55)
+
+    def __init__(self, reviews_per_app=10_000, latency=0.05, latency_dist="lognormal",
+                 throttle_rate=0.0, max_rps=None, review_length=200, seed=0):
+        self.reviews_per_app = reviews_per_app
+        self.latency = latency
+        self.latency_dist = latency_dist
+        self.throttle_rate = throttle_rate
+        self.max_rps = max_rps
+        self.review_length = review_length
+        self.requests = 0
+        self.throttled = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._window_requests = 0
+        self._epoch = datetime(2025, 1, 1)
+        cumulative = 0
+        self._score_bounds = []
+        for weight in self.SCORE_WEIGHTS:
+            cumulative += weight
+            self._score_bounds.append(cumulative)
+
+    def _score(self, index):
+        bucket = (index * 7919) % 100
+        for score, bound in enumerate(self._score_bounds, start=1):
+            if bucket < bound:
+                return score
+        return 5
+
+    def _review(self, app_id, index):
+        text = f"review {index} of {app_id} "
+        return {
+            "reviewId": f"sim-{app_id}-{index}",
+            "userName": f"user{index}",
+            "userImage": None,
+            "content": (text * (self.review_length // len(text) + 1))[:self.review_length],
+            "score": self._score(index),
+            "thumbsUpCount": index % 17,
+            "reviewCreatedVersion": "1.0.0",
+            "at": datetime.fromtimestamp(self._epoch.timestamp() - index * 60),
+            "replyContent": None,
+            "repliedAt": None,
+        }
+
+    def _delay(self):
+        if not self.latency:
+            return 0.0
+        if self.latency_dist == "exponential":
+            return self._random.expovariate(1 / self.latency)
+        if self.latency_dist == "lognormal":
+            # sigma 0.5 gives a realistic long tail; mu keeps the mean at latency
+            return self._random.lognormvariate(math.log(self.latency) - 0.125, 0.5)
+        return self.latency
+
+    def fetch_page(self, app_id, lang, country, score, count, token=None):
+        with self._lock:
+            self.requests += 1
+            now = time.monotonic()
+            if now - self._window_start >= 1.0:
+                self._window_start = now
+                self._window_requests = 0
+            self._window_requests += 1
+            throttle = self._random.random() < self.throttle_rate or (
+                self.max_rps is not None and self._window_requests > self.max_rps
+            )
+            delay = self._delay()
+            if throttle:
+                self.throttled += 1
+        time.sleep(delay)
+        if throttle:
+            raise SimulatedHTTPError(429)
+
+        index = int(token["token"]) if token else 0
+        page = []
+        while index < self.reviews_per_app and len(page) < count:
+            if score is None or self._score(index) == score:
+                page.append(self._review(app_id, index))
+            index += 1
+        next_token = {"token": str(index)} if index < self.reviews_per_app else None
+        return page, next_token
+
+    def fetch_app_metadata(self, app_id, lang, country):
+        # A fixed catalogue never changes, so its signature is constant
+        histogram = [self.reviews_per_app * weight // 100 for weight in self.SCORE_WEIGHTS]
+        return signature({
+            "reviews": self.reviews_per_app,
+            "ratings": sum(histogram),
+            "histogram": histogram,
+            "updated": int(self._epoch.timestamp()),
+            "version": "1.0.0",
+        })
@@ -0,0 +1,143 @@
+# scripts/http_pool.py
+from urllib.parse import urlsplit
+import gzip
+import http.client
+import threading
+import zlib
+
+# Keep-alive connections held at once, across every app and thread
+DEFAULT_POOL_SIZE = 16
+# Seconds to wait for connect and for each read
+HTTP_TIMEOUT = 30
+
+# Errors meaning an idle keep-alive connection was closed by the server
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, http.client.BadStatusLine, ConnectionResetError,
+                           BrokenPipeError)
+
+class HTTPConnectionPool:
+    """Thread-safe pool of persistent HTTPS connections
+
+    At most max_connections connections exist at once; a request waits for
+    a free one instead of opening more. A connection is returned to the
+    pool once its response has been read completely, so consecutive pages
+    reuse the same TLS session and cost roughly one round trip each. A
+    request on an idle connection the server has meanwhile closed is
+    retried once on a fresh connection.
+    """
+
+    def __init__(self, max_connections=DEFAULT_POOL_SIZE, timeout=HTTP_TIMEOUT):
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._idle = {}
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "connections_opened": 0, "reused": 0, "stale_retries": 0, "errors": 0}
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self._stats[key] += n
+
+    def _connection(self, scheme, host):
+        with self._lock:
+            idle = self._idle.get((scheme, host))
+            if idle:
+                self._stats["reused"] += 1
+                return idle.pop(), True
+            self._stats["connections_opened"] += 1
+        connection_class = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return connection_class(host, timeout=self.timeout), False
+
+    def _release(self, scheme, host, connection):
+        with self._lock:
+            self._idle.setdefault((scheme, host), []).append(connection)
+
+    def request(self, method, url, body=None, headers=None):
+        """Send a request and return (status, decoded body bytes)"""
+        parts = urlsplit(url)
+        path = parts.path + (f"?{parts.query}" if parts.query else "")
+        headers = dict(headers or {}, **{"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"})
+        self._count("requests")
+        with self._slots:
+            for attempt in range(2):
+                connection, reused = self._connection(parts.scheme, parts.netloc)
+                try:
+                    connection.request(method, path, body=body, headers=headers)
+                    response = connection.getresponse()
+                    data = response.read()
+                except STALE_CONNECTION_ERRORS:
+                    connection.close()
+                    if reused and attempt == 0:
+                        self._count("stale_retries")
+                        continue
+                    self._count("errors")
+                    raise
+                except (OSError, http.client.HTTPException):
+                    connection.close()
+                    self._count("errors")
+                    raise
+                if response.will_close:
+                    connection.close()
+                else:
+                    self._release(parts.scheme, parts.netloc, connection)
+                break
+
+        encoding = (response.getheader("Content-Encoding") or "").lower()
+        if encoding == "gzip":
+            data = gzip.decompress(data)
+        elif encoding == "deflate":
+            data = zlib.decompress(data)
+        return response.status, data
+
+    def stats(self):
+        """Request and connection counters, with the connection reuse rate"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["idle"] = sum(len(idle) for idle in self._idle.values())
+        stats["max_connections"] = self.max_connections
+        attempts = stats["reused"] + stats["connections_opened"]
+        stats["reuse_rate"] = round(stats["reused"] / attempts, 4) if attempts else None
+        return stats
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def install_pool(max_connections=DEFAULT_POOL_SIZE):
+    """Route google_play_scraper's review requests through one shared pool
+
+    The library opens a fresh urllib connection per request; its reviews
+    feature imports post() by name, so that reference is replaced with a
+    pooled equivalent raising the same exceptions. Idempotent: later calls
+    return the already installed pool.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            return _pool
+        import google_play_scraper.features.reviews as reviews_feature
+
+        _pool = HTTPConnectionPool(max_connections)
+        reviews_feature.post = pooled_post
+        return _pool
+
+def pooled_post(url, data, headers):
+    """google_play_scraper's post() over the installed pool"""
+    from google_play_scraper.exceptions import ExtraHTTPError, NotFoundError
+
+    status, body = _pool.request("POST", url, body=data, headers=headers)
+    # Same errors and messages as google_play_scraper.utils.request._urlopen
+    if status == 404:
+        raise NotFoundError("App not found(404).")
+    if status >= 400:
+        raise ExtraHTTPError(f"App not found. Status code {status} returned.")
+    return body.decode("UTF-8")
+
+def pool_stats():
+    """Stats of the installed pool, or None when requests are not pooled"""
+    return _pool.stats() if _pool is not None else None
@@ -0,0 +1,102 @@
+# scripts/page_decoder.py
+from datetime import datetime
+import json
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:  # orjson is optional; stdlib json decodes the same payloads, only slower
+    _loads = json.loads
+
+# Review fields kept from a Play payload item
+FIELDS = ("reviewId", "score", "content", "at", "thumbsUpCount", "replyContent", "repliedAt", "reviewCreatedVersion")
+
+# Prefix Google prepends to batchexecute responses to defeat JSON hijacking
+_XSSI_PREFIX = ")]}'"
+
+class ReviewPage:
+    """A page of reviews held as one list per field instead of one dict per review
+
+    Indexing with an int builds that review's dict on demand, and iterating
+    yields dicts, so code written for lists of review dicts keeps working;
+    the scraper's hot path reads whole columns through page_column.
+    """
+
+    def __init__(self, columns):
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.columns["reviewId"])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ReviewPage({name: values[index] for name, values in self.columns.items()})
+        return {name: values[index] for name, values in self.columns.items()}
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def select(self, indices):
+        return ReviewPage({name: [values[i] for i in indices] for name, values in self.columns.items()})
+
+def page_column(page, name):
+    """One field of every review in a ReviewPage or a list of review dicts"""
+    if isinstance(page, ReviewPage):
+        return page.columns[name]
+    return [review.get(name) for review in page]
+
+def select_reviews(page, indices):
+    """The reviews at indices, keeping a ReviewPage columnar"""
+    if isinstance(page, ReviewPage):
+        return page.select(indices)
+    return [page[i] for i in indices]
+
+def _timestamp(seconds):
+    # Naive local time, as google_play_scraper returns it
+    return datetime.fromtimestamp(seconds) if seconds else None
+
+def _next_token(data):
+    # The continuation token is the string closing the trailing [null, token]
+    # pair; its position from the end differs between library versions
+    for tail in reversed(data[1:]):
+        if isinstance(tail, list) and tail and isinstance(tail[-1], str):
+            return tail[-1]
+    return None
+
+def decode_page(payload):
+    """Decode a raw reviews batchexecute response into (ReviewPage, token string or None)
+
+    Only the kept fields are read, by fixed index path, straight into
+    column lists; the inner JSON document is parsed with orjson when it is
+    installed.
+    """
+    if isinstance(payload, bytes):
+        payload = payload.decode("utf-8")
+    if payload.startswith(_XSSI_PREFIX):
+        payload = payload[len(_XSSI_PREFIX):]
+    envelope = _loads(payload)
+    inner = envelope[0][2]
+    columns = {name: [] for name in FIELDS}
+    if inner is None:
+        # No (more) reviews for this app, locale and filter
+        return ReviewPage(columns), None
+
+    data = _loads(inner)
+    review_ids, scores, contents, ats = (columns[name] for name in ("reviewId", "score", "content", "at"))
+    thumbs_up, reply_contents, replied_ats, versions = (
+        columns[name] for name in ("thumbsUpCount", "replyContent", "repliedAt", "reviewCreatedVersion")
+    )
+    # Same index paths as google_play_scraper's ElementSpecs.Review
+    for item in data[0] or ():
+        review_ids.append(item[0])
+        scores.append(item[2])
+        contents.append(item[4])
+        at = item[5]
+        ats.append(_timestamp(at[0]) if at else None)
+        thumbs_up.append(item[6])
+        reply = item[7]
+        reply_contents.append(reply[1] if reply else None)
+        replied_ats.append(_timestamp(reply[2][0]) if reply and len(reply) > 2 and reply[2] else None)
+        versions.append(item[10] if len(item) > 10 else None)
+    return ReviewPage(columns), _next_token(data)
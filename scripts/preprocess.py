@@ -1,9 +1,15 @@
 # scripts/preprocess.py
 import pandas as pd
 import numpy as np
+import argparse
 import re
 import os
 from pathlib import Path
+from raw_store import CHANGES_DIR, RAW_DIR, iter_raw_chunks, read_raw
+from review_sample import SAMPLE_DIR, latest_sample, read_sample
+
+# Raw columns needed downstream; the rest of the raw schema is never decompressed
+RAW_COLUMNS = ["review_id", "bank", "review", "rating", "date", "source"]
 
 def clean_text(text):
     if not isinstance(text, str):
@@ -14,16 +20,28 @@ def clean_text(text):
     text = re.sub(r'\s+', ' ', text).strip()
     return text
 
-def preprocess_reviews(df):
+def preprocess_reviews(df, seen_ids=None, verbose=True):
+    """Clean one frame of raw reviews
+
+    seen_ids carries review_ids across calls so a chunked run dedupes
+    against every earlier chunk; it is updated in place.
+    """
+    log = print if verbose else (lambda *_: None)
     # Handle missing data
-    print(f"Initial reviews: {len(df)}")
+    log(f"Initial reviews: {len(df)}")
     df = df.dropna(subset=["review"])
     df = df[df["review"] != ""]
-    print(f"After removing empty reviews: {len(df)}")
+    log(f"After removing empty reviews: {len(df)}")
     
-    # Remove duplicates
-    df = df.drop_duplicates(subset=["review", "bank", "date"])
-    print(f"After removing duplicates: {len(df)}")
+    # Remove duplicates (legacy CSV exports have no review_id)
+    if "review_id" in df.columns:
+        df = df.drop_duplicates(subset=["review_id"])
+        if seen_ids is not None:
+            df = df[~df["review_id"].isin(seen_ids)]
+            seen_ids.update(df["review_id"])
+    else:
+        df = df.drop_duplicates(subset=["review", "bank", "date"])
+    log(f"After removing duplicates: {len(df)}")
     
     # Clean text
     df["clean_review"] = df["review"].apply(clean_text)
@@ -33,23 +51,111 @@ def preprocess_reviews(df):
     
     # Filter valid ratings (1-5)
     df = df[df["rating"].between(1, 5)]
-    print(f"After rating filter: {len(df)}")
+    log(f"After rating filter: {len(df)}")
     
     # Select final columns
-    return df[["bank", "review", "clean_review", "rating", "date", "source"]]
+    columns = ["bank", "review", "clean_review", "rating", "date", "source"]
+    if "review_id" in df.columns:
+        columns.insert(0, "review_id")
+    if "sample_weight" in df.columns:
+        columns.append("sample_weight")
+    return df[columns]
+
+def load_changes(source=CHANGES_DIR):
+    """Latest version of every edited review in a change delta file or the change store"""
+    if os.path.isdir(source):
+        changes = read_raw(source, columns=RAW_COLUMNS + ["at"])
+    elif os.path.exists(source):
+        changes = pd.read_parquet(source, columns=RAW_COLUMNS + ["at"])
+    else:
+        return pd.DataFrame(columns=RAW_COLUMNS)
+    return changes.sort_values("at").drop_duplicates(subset=["review_id"], keep="last")[RAW_COLUMNS]
+
+def preprocess_changes(source, output_path):
+    """Clean only edited reviews, for re-running sentiment and theming on them
+
+    Downstream results for these review_ids replace the earlier ones.
+    """
+    cleaned = preprocess_reviews(load_changes(source))
+    cleaned.to_csv(output_path, index=False)
+    return cleaned
+
+def preprocess_sample(sample_dir, output_path):
+    """Clean a sampled snapshot, keeping each review's sample_weight for re-weighted aggregates"""
+    cleaned = preprocess_reviews(read_sample(sample_dir, columns=RAW_COLUMNS))
+    cleaned.to_csv(output_path, index=False)
+    return cleaned
+
+def preprocess_raw_store(output_path, root=RAW_DIR, changes_root=CHANGES_DIR):
+    """Stream the compressed raw store through preprocess_reviews chunk by chunk
+
+    Each cleaned chunk is appended to output_path straight away, so raw
+    rows are held one chunk at a time; the review_ids seen so far and the
+    change stream are held whole and grow with the history. Edited reviews
+    are taken in their latest version from the change stream. Returns (raw
+    rows read, per-bank counts).
+    """
+    changes = load_changes(changes_root)
+    seen_ids = set()
+    raw_rows = 0
+    bank_counts = pd.Series(dtype="int64")
+    first = True
+    for chunk in iter_raw_chunks(root, columns=RAW_COLUMNS):
+        raw_rows += len(chunk)
+        chunk = chunk[~chunk["review_id"].isin(changes["review_id"])]
+        if first and not changes.empty:
+            chunk = pd.concat([changes, chunk], ignore_index=True)
+        cleaned = preprocess_reviews(chunk, seen_ids=seen_ids, verbose=False)
+        cleaned.to_csv(output_path, mode="w" if first else "a", header=first, index=False)
+        bank_counts = bank_counts.add(cleaned["bank"].value_counts(), fill_value=0)
+        first = False
+    if first:
+        # Empty store: still leave a header-only file for the next stage
+        pd.DataFrame(columns=["review_id", "bank", "review", "clean_review", "rating", "date", "source"]).to_csv(
+            output_path, index=False
+        )
+    return raw_rows, bank_counts.astype("int64")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Clean scraped reviews for analysis")
+    parser.add_argument("--changes", nargs="?", const=CHANGES_DIR, default=None, metavar="PATH",
+                        help="only clean edited reviews from a change delta file or the change store")
+    parser.add_argument("--sample", nargs="?", const="latest", default=None, metavar="DIR",
+                        help=f"only clean a sampled snapshot (default: the newest one in {SAMPLE_DIR})")
+    return parser.parse_args()
 
 if __name__ == "__main__":
+    args = parse_args()
     # Ensure directories exist
     Path("data/processed").mkdir(parents=True, exist_ok=True)
     
     try:
-        raw_df = pd.read_csv("data/raw/reviews_raw.csv")
-        cleaned_df = preprocess_reviews(raw_df)
-        
-        # Save cleaned data
-        cleaned_df.to_csv("data/processed/reviews_clean.csv", index=False)
-        print(f"\n✅ Processed {len(cleaned_df)} reviews")
-        print(f"Bank distribution:\n{cleaned_df['bank'].value_counts()}")
+        output_path = "data/processed/reviews_clean.csv"
+        if args.changes:
+            changes_path = "data/processed/reviews_changes.csv"
+            cleaned_df = preprocess_changes(args.changes, changes_path)
+            print(f"\n✅ Processed {len(cleaned_df)} edited reviews into {changes_path}")
+        elif args.sample:
+            sample_dir = latest_sample() if args.sample == "latest" else args.sample
+            if sample_dir is None:
+                raise FileNotFoundError(f"No finished sample in {SAMPLE_DIR}; run scraper.py --sample-pages N")
+            sample_path = "data/processed/reviews_sample.csv"
+            cleaned_df = preprocess_sample(sample_dir, sample_path)
+            print(f"\n✅ Processed {len(cleaned_df)} sampled reviews from {sample_dir} into {sample_path}")
+            weighted = cleaned_df.groupby("bank")["sample_weight"].sum()
+            print(f"Weighted rating mass per bank:\n{weighted}")
+        elif os.path.isdir(RAW_DIR):
+            raw_rows, bank_counts = preprocess_raw_store(output_path)
+            print(f"\n✅ Processed {int(bank_counts.sum())} of {raw_rows} raw reviews")
+            print(f"Bank distribution:\n{bank_counts}")
+        else:
+            raw_df = pd.read_csv("data/raw/reviews_raw.csv")
+            cleaned_df = preprocess_reviews(raw_df)
+            
+            # Save cleaned data
+            cleaned_df.to_csv(output_path, index=False)
+            print(f"\n✅ Processed {len(cleaned_df)} reviews")
+            print(f"Bank distribution:\n{cleaned_df['bank'].value_counts()}")
         
     except Exception as e:
         print(f"\n❌ Error: {e}")
@@ -0,0 +1,261 @@
+# scripts/rate_limiter.py
+from functools import partial
+from urllib.error import URLError
+import json
+import os
+import random
+import re
+import socket
+import threading
+import tempfile
+import time
+from google_play_scraper.exceptions import ExtraHTTPError
+
+try:
+    import fcntl
+except ImportError:  # Windows has no flock; the shared budget is POSIX-only
+    fcntl = None
+
+# HTTP status codes treated as "slow down" rather than hard failures
+THROTTLE_STATUS_CODES = {408, 425, 429}
+
+def _status_code(exc):
+    code = getattr(exc, "code", None)
+    if isinstance(code, int):
+        return code
+    if isinstance(exc, ExtraHTTPError):
+        # google_play_scraper wraps HTTP errors and only keeps the code in the message
+        match = re.search(r"Status code (\d{3})", str(exc))
+        return int(match.group(1)) if match else None
+    return None
+
+def is_throttle_error(exc):
+    """True for throttling, 5xx and transient network errors worth retrying"""
+    code = _status_code(exc)
+    if code is not None:
+        return code in THROTTLE_STATUS_CODES or 500 <= code < 600
+    return isinstance(exc, (URLError, ConnectionError, TimeoutError, socket.timeout))
+
+class TokenBucketLimiter:
+    """Adaptive token bucket with exponential backoff and jitter
+
+    The refill rate grows additively on every successful request and is cut
+    multiplicatively on every throttle, so it settles just below the highest
+    rate the endpoint sustains. Any object with acquire/on_success/
+    on_throttle/stats can be used in its place. An optional shared budget
+    (see SharedRateBudget) is drawn from after the local bucket, and is told
+    about successes and throttles too.
+    """
+
+    def __init__(self, rate=1.0, burst=1, min_rate=0.1, max_rate=10.0,
+                 increase_step=0.1, decrease_factor=0.5,
+                 base_backoff=1.0, max_backoff=60.0, max_retries=6, budget=None):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.max_retries = max_retries
+        self.budget = budget
+
+        self.requests = 0
+        self.retries = 0
+        self.throttles = 0
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be sent"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    self.requests += 1
+                    break
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+        if self.budget is not None:
+            self.budget.acquire()
+
+    def on_success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase_step)
+        if self.budget is not None:
+            self.budget.on_success()
+
+    def on_throttle(self, attempt):
+        """Slow down after a throttled request and sleep before the retry"""
+        with self._lock:
+            self.throttles += 1
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            self._tokens = 0
+        if self.budget is not None:
+            self.budget.on_throttle()
+        # Full jitter keeps concurrent workers from retrying in lockstep
+        time.sleep(random.uniform(0, min(self.max_backoff, self.base_backoff * 2 ** attempt)))
+
+    def call(self, fn, *args, **kwargs):
+        """Call fn under the limiter, retrying throttled attempts"""
+        for attempt in range(self.max_retries + 1):
+            self.acquire()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                if attempt == self.max_retries or not is_throttle_error(e):
+                    raise
+                self.on_throttle(attempt)
+                with self._lock:
+                    self.retries += 1
+                continue
+            self.on_success()
+            return result
+
+    def stats(self):
+        with self._lock:
+            stats = {
+                "rate": round(self.rate, 3),
+                "requests": self.requests,
+                "retries": self.retries,
+                "throttles": self.throttles
+            }
+        if self.budget is not None:
+            stats["shared_rate"] = round(self.budget.rate(), 3)
+        return stats
+
+DEFAULT_BUDGET_PATH = os.path.join(tempfile.gettempdir(), "bank-review-scraper.budget.json")
+
+class SharedRateBudget:
+    """Host-wide token bucket shared by every scraper process via a locked file
+
+    The bucket state (tokens, refill rate, last update) lives in a small JSON
+    file guarded by flock, so concurrent processes draw from one budget. The
+    shared rate adapts like TokenBucketLimiter: a throttle seen by any process
+    slows all of them down.
+    """
+
+    def __init__(self, path=DEFAULT_BUDGET_PATH, rate=2.0, burst=2, min_rate=0.1, max_rate=20.0,
+                 increase_step=0.05, decrease_factor=0.5):
+        if fcntl is None:
+            raise RuntimeError("SharedRateBudget requires fcntl (POSIX only)")
+        self.path = path
+        self.initial_rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self._local = threading.Lock()
+
+    def _update(self, fn):
+        """Run fn(state) -> result under the cross-process lock"""
+        with self._local, open(self.path, "a+", encoding="utf-8") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                raw = f.read()
+                state = json.loads(raw) if raw.strip() else {
+                    "tokens": self.burst, "rate": self.initial_rate, "updated": time.time()
+                }
+                now = time.time()
+                state["tokens"] = min(self.burst, state["tokens"] + max(0.0, now - state["updated"]) * state["rate"])
+                state["updated"] = now
+                result = fn(state)
+                f.seek(0)
+                f.truncate()
+                json.dump(state, f)
+                f.flush()
+                return result
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def acquire(self):
+        """Block until the shared budget grants a request"""
+        def take(state):
+            if state["tokens"] >= 1:
+                state["tokens"] -= 1
+                return 0
+            return (1 - state["tokens"]) / state["rate"]
+
+        while True:
+            wait = self._update(take)
+            if not wait:
+                return
+            time.sleep(wait)
+
+    def on_success(self):
+        def increase(state):
+            state["rate"] = min(self.max_rate, state["rate"] + self.increase_step)
+        self._update(increase)
+
+    def on_throttle(self):
+        def decrease(state):
+            state["rate"] = max(self.min_rate, state["rate"] * self.decrease_factor)
+            state["tokens"] = 0
+        self._update(decrease)
+
+    def rate(self):
+        return self._update(lambda state: state["rate"])
+
+def host_limiter_factory(budget_path=DEFAULT_BUDGET_PATH, rate=2.0):
+    """Per-app limiter factory drawing from the host-wide budget at budget_path
+
+    Every scraper process (cron runs, the daemon, workers) uses the same
+    default path, so they share one budget unless budget_path is None.
+    Without fcntl the limiters stay process-local.
+    """
+    if budget_path is None or fcntl is None:
+        return TokenBucketLimiter
+    return partial(TokenBucketLimiter, budget=SharedRateBudget(budget_path, rate=rate))
+
+class RateBudget:
+    """In-process token bucket shared by every limiter of one review source
+
+    Same interface and adaptation as SharedRateBudget, but held in memory:
+    each source connector gets its own, so a source's total request rate
+    stays under its limit however many apps it scrapes at once, and a
+    throttle from one source never slows the others down.
+    """
+
+    def __init__(self, rate=2.0, burst=2, min_rate=0.1, max_rate=20.0, increase_step=0.05, decrease_factor=0.5):
+        self._rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until the source's budget grants a request"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self._rate
+            time.sleep(wait)
+
+    def on_success(self):
+        with self._lock:
+            self._rate = min(self.max_rate, self._rate + self.increase_step)
+
+    def on_throttle(self):
+        with self._lock:
+            self._rate = max(self.min_rate, self._rate * self.decrease_factor)
+            self._tokens = 0
+
+    def rate(self):
+        with self._lock:
+            return self._rate
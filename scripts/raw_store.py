@@ -0,0 +1,381 @@
+# scripts/raw_store.py
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import quote
+import json
+import os
+import threading
+import time
+import uuid
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+try:
+    import fcntl
+except ImportError:  # Windows has no flock; compactions are then not serialised
+    fcntl = None
+
+RAW_DIR = "data/raw/reviews"
+# Change stream: new versions of edited reviews, in the raw store's layout and schema
+CHANGES_DIR = "data/raw/changes"
+
+# Typed schema of the raw review store; review_id is the stable Play review key
+RAW_SCHEMA = pa.schema([
+    ("review_id", pa.string()),
+    ("bank", pa.string()),
+    ("app_id", pa.string()),
+    ("review", pa.string()),
+    ("rating", pa.int8()),
+    ("date", pa.date32()),
+    ("at", pa.timestamp("s")),
+    ("thumbs_up", pa.int32()),
+    ("review_created_version", pa.string()),
+    ("reply_content", pa.string()),
+    ("replied_at", pa.timestamp("s")),
+    ("lang", pa.string()),
+    ("country", pa.string()),
+    ("source", pa.string()),
+])
+
+# Column encoded in the bank=... directory names instead of the files; date
+# stays in the files, whose row-group statistics let readers skip other days
+PARTITION_SCHEMA = pa.schema([("bank", pa.string())])
+FILE_SCHEMA = pa.schema([field for field in RAW_SCHEMA if field.name not in PARTITION_SCHEMA.names])
+NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+# Uncommitted rows buffered before every open partition is committed
+COMMIT_ROWS = 20_000
+# Rows per Parquet row group; rows are sorted by time, so each group spans few days
+ROW_GROUP_ROWS = 10_000
+# Part files with fewer rows are merged by compact_store
+COMPACT_ROWS = 100_000
+# Parquet codec for raw part and delta files; review text compresses well with zstd
+COMPRESSION = "zstd"
+COMPRESSION_LEVEL = 6
+# Rows per chunk yielded by iter_raw_chunks
+CHUNK_ROWS = 50_000
+# In-progress temp files older than this are leftovers of crashed writers
+STALE_TMP_SECONDS = 24 * 3600
+
+def partition_dir(root, bank):
+    """bank=<bank> directory of one raw partition"""
+    bank_value = quote(bank, safe="") if bank is not None else NULL_PARTITION
+    return Path(root) / f"bank={bank_value}"
+
+def _runs(column):
+    """(value, offset, length) of every run of equal consecutive values"""
+    encoded = pc.run_end_encode(column.combine_chunks())
+    offset = 0
+    for end, value in zip(encoded.run_ends.to_pylist(), encoded.values.to_pylist()):
+        yield value, offset, end - offset
+        offset = end
+
+def split_partitions(table):
+    """Split a RAW_SCHEMA table into {bank: FILE_SCHEMA table}
+
+    A page belongs to one app, so each partition is normally one contiguous
+    run of rows and is sliced out without copying or filtering.
+    """
+    slices = {}
+    for bank, offset, length in _runs(table["bank"]):
+        slices.setdefault(bank, []).append(table.slice(offset, length).select(FILE_SCHEMA.names))
+    return {bank: parts[0] if len(parts) == 1 else pa.concat_tables(parts) for bank, parts in slices.items()}
+
+def _fsync_dir(path):
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def _sorted(table):
+    # Newest first, so the row groups of a part cover consecutive days
+    return table.sort_by([("at", "descending")])
+
+def atomic_write_table(table, path, compression=COMPRESSION, compression_level=COMPRESSION_LEVEL):
+    """Write a Parquet file via temp file + fsync + rename
+
+    Readers ignore the dot-prefixed temp file, so they see either the old
+    state or the complete new file, never a torn write.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.parent / f".{path.name}.tmp"
+    with open(tmp_path, "wb") as f:
+        pq.write_table(table, f, row_group_size=ROW_GROUP_ROWS, compression=compression,
+                       compression_level=compression_level)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    _fsync_dir(path.parent)
+
+class RawReviewSink:
+    """Thread-safe sink writing the raw store as Hive-partitioned Parquet
+
+    Rows are grouped into bank=<bank> partitions and buffered. Once
+    COMMIT_ROWS rows are buffered (and on flush or close), every buffered
+    partition is committed as one new part file, sorted newest first, using
+    an atomic temp-file rename, so memory stays bounded by the commit
+    window and a crash never leaves a torn file behind. Callbacks
+    registered with on_commit (e.g. checkpoint saves) run only after every
+    page written before them has been committed. With a changes_root,
+    write_changes buffers edited reviews into a separate change stream that
+    is committed together with the new reviews.
+    """
+
+    def __init__(self, root=RAW_DIR, run_id=None, changes_root=None):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.changes_root = Path(changes_root) if changes_root is not None else None
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.rows = 0
+        self.changed_rows = 0
+        self.files = []
+        self._lock = threading.Lock()
+        self._partitions = {}
+        self._buffered_rows = 0
+        self._pending = []
+        self._sweep_stale_tmp()
+        # A resumed run keeps its committed parts, some maybe compacted away, so number on from the highest
+        self._next_part = 1 + max(
+            (int(path.stem.rsplit("-", 1)[1]) for path in self.run_files() + self.change_files()), default=-1
+        )
+
+    def _roots(self):
+        return [self.root] + ([self.changes_root] if self.changes_root is not None else [])
+
+    def _sweep_stale_tmp(self):
+        cutoff = time.time() - STALE_TMP_SECONDS
+        for root in self._roots():
+            for path in root.rglob(".part-*.tmp"):
+                if path.stat().st_mtime < cutoff:
+                    path.unlink(missing_ok=True)
+
+    def run_files(self):
+        """Every committed part file of this run, including earlier attempts"""
+        return sorted(self.root.rglob(f"part-{self.run_id}-*.parquet"))
+
+    def change_files(self):
+        """Every committed change-stream part file of this run"""
+        if self.changes_root is None:
+            return []
+        return sorted(self.changes_root.rglob(f"part-{self.run_id}-*.parquet"))
+
+    def write(self, records):
+        """Buffer a page, given as a RAW_SCHEMA table or a list of record dicts"""
+        self._buffer(records, self.root)
+
+    def write_changes(self, records):
+        """Buffer new versions of already ingested (edited) reviews"""
+        if self.changes_root is None:
+            raise ValueError("RawReviewSink was created without a changes_root")
+        self._buffer(records, self.changes_root)
+
+    def _buffer(self, records, root):
+        if not len(records):
+            return
+        if not isinstance(records, pa.Table):
+            records = pa.Table.from_pylist(records, schema=RAW_SCHEMA)
+        tables = {(root, bank): table for bank, table in split_partitions(records).items()}
+        with self._lock:
+            for key, table in tables.items():
+                self._partitions.setdefault(key, []).append(table)
+            self._buffered_rows += len(records)
+            if root == self.root:
+                self.rows += len(records)
+            else:
+                self.changed_rows += len(records)
+            if self._buffered_rows >= COMMIT_ROWS:
+                self._commit()
+
+    def on_commit(self, callback):
+        """Run callback once everything written so far is committed"""
+        with self._lock:
+            if self._partitions:
+                self._pending.append(callback)
+                return
+        callback()
+
+    def _commit(self):
+        for (root, bank), tables in self._partitions.items():
+            path = partition_dir(root, bank) / f"part-{self.run_id}-{self._next_part:05d}.parquet"
+            self._next_part += 1
+            atomic_write_table(_sorted(pa.concat_tables(tables)), path)
+            self.files.append(path)
+        self._partitions = {}
+        self._buffered_rows = 0
+        pending, self._pending = self._pending, []
+        for callback in pending:
+            callback()
+
+    def flush(self):
+        """Commit every buffered partition now"""
+        with self._lock:
+            self._commit()
+
+    def close(self):
+        self.flush()
+
+    def prune_other_runs(self):
+        """Delete part files left by other runs, after a full rescrape
+
+        Older change-stream parts are superseded by the rescraped versions
+        and are deleted as well.
+        """
+        for root in self._roots():
+            for path in root.rglob("part-*.parquet"):
+                if not path.name.startswith(f"part-{self.run_id}-"):
+                    path.unlink()
+            for directory in sorted(root.rglob("*"), key=lambda p: len(p.parts), reverse=True):
+                if directory.is_dir() and not any(directory.iterdir()):
+                    directory.rmdir()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+@contextmanager
+def _compaction_lock(root):
+    if fcntl is None:
+        yield
+        return
+    with open(Path(root) / ".compact.lock", "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def _finish_compaction(journal):
+    """Complete or roll back the compaction recorded in a journal file"""
+    with open(journal, encoding="utf-8") as f:
+        plan = json.load(f)
+    directory = journal.parent
+    if (directory / plan["output"]).exists():
+        # The merged file was committed: its inputs must go
+        for name in plan["inputs"]:
+            (directory / name).unlink(missing_ok=True)
+    else:
+        (directory / f".{plan['output']}.tmp").unlink(missing_ok=True)
+    journal.unlink()
+
+def _merge_parts(directory, paths):
+    compaction_id = uuid.uuid4().hex[:12]
+    name = f"part-compact{compaction_id}-00000.parquet"
+    journal = directory / f".compact-{compaction_id}.json"
+    tmp_path = journal.with_suffix(".json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"output": name, "inputs": [path.name for path in paths]}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, journal)
+    table = pa.concat_tables(pq.ParquetFile(path).read(columns=FILE_SCHEMA.names) for path in paths)
+    atomic_write_table(_sorted(table), directory / name)
+    _finish_compaction(journal)
+
+def compact_store(root=RAW_DIR, min_rows=COMPACT_ROWS):
+    """Merge each partition's part files below min_rows into larger part files
+
+    Every commit adds small part files, one per bank, so this runs after
+    each scrape. Small parts are merged in groups of about min_rows rows,
+    so no merged file is rewritten once it is large. A journal written
+    before the merged file is committed lets the next compaction finish
+    deleting the inputs after a crash, so rows are never lost or left
+    duplicated. Parts of a run whose files are still needed (e.g. for a
+    daemon delta) must be used before compacting. Returns the number of
+    part files merged away.
+    """
+    root = Path(root)
+    if not root.is_dir():
+        return 0
+    merged = 0
+    with _compaction_lock(root):
+        for journal in root.glob("*/.compact-*.json"):
+            _finish_compaction(journal)
+        for directory in sorted(path for path in root.iterdir() if path.is_dir()):
+            small = []
+            for path in sorted(directory.glob("part-*.parquet")):
+                rows = pq.ParquetFile(path).metadata.num_rows
+                if rows < min_rows:
+                    small.append((path, rows))
+            group, group_rows = [], 0
+            for index, (path, rows) in enumerate(small):
+                group.append(path)
+                group_rows += rows
+                if group_rows >= min_rows or index == len(small) - 1:
+                    if len(group) > 1:
+                        _merge_parts(directory, group)
+                        merged += len(group) - 1
+                    group, group_rows = [], 0
+    return merged
+
+def raw_dataset(source=RAW_DIR, root=RAW_DIR):
+    """pyarrow dataset over the partitioned store (or a list of part files under root)
+
+    bank is recovered from the directory names; dot-prefixed in-progress
+    files are ignored.
+    """
+    return ds.dataset(
+        source,
+        schema=RAW_SCHEMA,
+        format="parquet",
+        partitioning=ds.partitioning(PARTITION_SCHEMA, flavor="hive"),
+        partition_base_dir=str(root) if isinstance(source, list) else None
+    )
+
+def _partition_filter(banks=None, since=None, until=None):
+    expression = None
+    for condition in (
+        ds.field("bank").isin(list(banks)) if banks else None,
+        ds.field("date") >= since if since else None,
+        ds.field("date") <= until if until else None,
+    ):
+        if condition is not None:
+            expression = condition if expression is None else expression & condition
+    return expression
+
+def read_raw(root=RAW_DIR, columns=None, banks=None, since=None, until=None):
+    """Load the raw store as a DataFrame
+
+    banks selects bank= directories; since and until (datetime.date) are
+    checked against each row group's date statistics, so only matching
+    row groups are read.
+    """
+    return raw_dataset(root).to_table(columns=columns, filter=_partition_filter(banks, since, until)).to_pandas()
+
+def iter_raw_chunks(root=RAW_DIR, columns=None, banks=None, since=None, until=None, chunk_rows=CHUNK_ROWS):
+    """Stream the raw store as DataFrames of up to chunk_rows rows
+
+    Part files are decompressed batch by batch, so memory is bounded by one
+    chunk no matter how large the history grows.
+    """
+    dataset = raw_dataset(root)
+    scanner = dataset.scanner(columns=columns, filter=_partition_filter(banks, since, until), batch_size=chunk_rows)
+    for batch in scanner.to_batches():
+        if batch.num_rows:
+            yield batch.to_pandas()
+
+def write_delta(files, path, root=RAW_DIR):
+    """Atomically concatenate committed part files into one delta file
+
+    Files are streamed batch by batch, with bank restored from their
+    partition directories. Returns the number of rows written.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.parent / f".{path.name}.tmp"
+    rows = 0
+    with pq.ParquetWriter(tmp_path, RAW_SCHEMA, compression=COMPRESSION, compression_level=COMPRESSION_LEVEL) as writer:
+        if files:
+            for batch in raw_dataset([str(file) for file in files], root).to_batches():
+                writer.write_batch(batch)
+                rows += batch.num_rows
+    os.replace(tmp_path, path)
+    _fsync_dir(path.parent)
+    return rows
@@ -0,0 +1,140 @@
+# scripts/review_fingerprints.py
+from pathlib import Path
+import hashlib
+import os
+import sqlite3
+import threading
+from page_decoder import page_column
+
+FINGERPRINT_DB_PATH = "data/raw/review_fingerprints.sqlite"
+
+# Reviews looked up per SQL statement (below SQLite's bound-parameter limit)
+LOOKUP_BATCH = 500
+
+def content_hash(content):
+    return hashlib.blake2b((content or "").encode("utf-8"), digest_size=16).digest()
+
+def _at_text(at):
+    # Second precision, identical for datetimes from the scraper and pandas Timestamps from the raw store
+    # NaT (a missing raw-store timestamp) is the only value unequal to itself
+    if at is None or at != at:
+        return None
+    return at.strftime("%Y-%m-%dT%H:%M:%S")
+
+def fingerprint(content, score, at):
+    """(content hash, score, timestamp) of one version of a review"""
+    return content_hash(content), int(score or 0), _at_text(at)
+
+class ReviewFingerprints:
+    """Exact per-reviewId fingerprints of the latest ingested version of each review
+
+    Play keeps a review's id when its author edits the text or rating and
+    moves its timestamp forward, so an incremental scrape sees the edit as
+    a "new" review with a known id. Comparing it against the stored
+    fingerprint tells new, edited and unchanged reviews apart.
+    """
+
+    def __init__(self, path=FINGERPRINT_DB_PATH):
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS fingerprints ("
+            "review_id TEXT PRIMARY KEY, content_hash BLOB NOT NULL, score INTEGER NOT NULL, at TEXT)"
+        )
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls, path=FINGERPRINT_DB_PATH, raw_root=None, changes_root=None):
+        """Open the fingerprint database, rebuilding it from the raw store when missing
+
+        The change stream is replayed after the raw store, so edited reviews
+        end up with the fingerprint of their latest version. The database is
+        built under a temporary name, so an interrupted rebuild starts over.
+        """
+        if not os.path.exists(path):
+            from raw_store import iter_raw_chunks
+            tmp_path = f"{path}.tmp"
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            with cls(tmp_path) as building:
+                for root in (raw_root, changes_root):
+                    if root is None or not os.path.isdir(root):
+                        continue
+                    for chunk in iter_raw_chunks(root, columns=["review_id", "review", "rating", "at"]):
+                        building._upsert(
+                            (review_id, *fingerprint(content, score, at))
+                            for review_id, content, score, at in zip(
+                                chunk["review_id"], chunk["review"], chunk["rating"], chunk["at"]
+                            )
+                            if review_id
+                        )
+            os.replace(tmp_path, path)
+        return cls(path)
+
+    def _upsert(self, rows):
+        with self._lock, self._conn:
+            # A version older than the stored one never overwrites it
+            self._conn.executemany(
+                "INSERT INTO fingerprints (review_id, content_hash, score, at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(review_id) DO UPDATE SET content_hash = excluded.content_hash, "
+                "score = excluded.score, at = excluded.at "
+                "WHERE excluded.at IS NULL OR fingerprints.at IS NULL OR excluded.at >= fingerprints.at",
+                rows
+            )
+
+    def classify(self, reviews):
+        """Return "new", "changed" or "unchanged" for each review, in order
+
+        reviews is a ReviewPage or a list of review dicts. Reviews without a
+        reviewId cannot be tracked and count as unchanged.
+        """
+        review_ids = page_column(reviews, "reviewId")
+        ids = [review_id for review_id in review_ids if review_id]
+        stored = {}
+        with self._lock:
+            for start in range(0, len(ids), LOOKUP_BATCH):
+                batch = ids[start:start + LOOKUP_BATCH]
+                stored.update(
+                    (row[0], tuple(row[1:]))
+                    for row in self._conn.execute(
+                        "SELECT review_id, content_hash, score, at FROM fingerprints "
+                        f"WHERE review_id IN ({','.join('?' * len(batch))})",
+                        batch
+                    )
+                )
+
+        statuses = []
+        for review_id, content, score, at in zip(
+            review_ids, page_column(reviews, "content"), page_column(reviews, "score"), page_column(reviews, "at")
+        ):
+            if not review_id:
+                statuses.append("unchanged")
+            elif review_id not in stored:
+                statuses.append("new")
+            elif stored[review_id] != fingerprint(content, score, at):
+                statuses.append("changed")
+            else:
+                statuses.append("unchanged")
+        return statuses
+
+    def update(self, reviews):
+        """Store the fingerprints of reviews that have been written"""
+        self._upsert(
+            (review_id, *fingerprint(content, score, at))
+            for review_id, content, score, at in zip(
+                page_column(reviews, "reviewId"), page_column(reviews, "content"),
+                page_column(reviews, "score"), page_column(reviews, "at")
+            )
+            if review_id
+        )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,68 @@
+# scripts/review_sample.py
+from pathlib import Path
+import json
+import os
+from raw_store import read_raw
+
+SAMPLE_DIR = "data/raw/samples"
+# Written once a sample's reviews are committed; a sample without it is incomplete
+WEIGHTS_FILE = "weights.json"
+
+SCORES = (1, 2, 3, 4, 5)
+
+def bucket_weights(histogram, sampled):
+    """Per-star-rating sampling weights of one app
+
+    histogram is the app's store rating count per star (1..5) and sampled
+    the reviews sampled per star. Each bucket's weight is the number of
+    store ratings one sampled review stands for, so weighting the sample
+    restores the app's real rating mix. A bucket without a histogram or
+    without sampled reviews has no weight.
+    """
+    buckets = {}
+    for score in SCORES:
+        population = histogram[score - 1] if histogram else None
+        count = sampled.get(score, 0)
+        buckets[str(score)] = {
+            "population": population,
+            "sampled": count,
+            "weight": population / count if population is not None and count else None,
+        }
+    return buckets
+
+def save_weights(sample_dir, weights):
+    path = Path(sample_dir) / WEIGHTS_FILE
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(weights, f, indent=2)
+    os.replace(tmp_path, path)
+
+def load_weights(sample_dir):
+    path = Path(sample_dir) / WEIGHTS_FILE
+    if not path.exists():
+        raise FileNotFoundError(f"{sample_dir} has no {WEIGHTS_FILE}; the sample run did not finish")
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def latest_sample(root=SAMPLE_DIR):
+    """Directory of the newest finished sample, or None"""
+    finished = sorted(path.parent for path in Path(root).glob(f"*/{WEIGHTS_FILE}"))
+    return finished[-1] if finished else None
+
+def read_sample(sample_dir, columns=None):
+    """Load a sample's reviews as a DataFrame with a sample_weight column
+
+    Reviews are matched to their weight by bank and star rating; reviews
+    of buckets without a weight get NaN.
+    """
+    weights = load_weights(sample_dir)
+    df = read_raw(Path(sample_dir) / "reviews", columns=columns)
+    weight_of = {
+        (app["bank"], int(score)): bucket["weight"]
+        for app in weights["apps"].values()
+        for score, bucket in app["buckets"].items()
+    }
+    df["sample_weight"] = [weight_of.get((bank, rating)) for bank, rating in zip(df["bank"], df["rating"])]
+    df["sample_weight"] = df["sample_weight"].astype("float64")
+    return df
@@ -0,0 +1,186 @@
+# scripts/scrape_daemon.py
+from datetime import datetime, timedelta
+from pathlib import Path
+import argparse
+import json
+import logging
+import os
+import signal
+import threading
+import traceback
+from app_registry import REGISTRY_PATH, load_schedule_state, load_sources, record_scrape, save_schedule_state
+from raw_store import write_delta
+from rate_limiter import DEFAULT_BUDGET_PATH, host_limiter_factory
+from scrape_metrics import METRICS_DIR, ScrapeMetrics
+from source_connectors import PLAY_SOURCE, app_key, make_connector
+import scraper
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+DELTA_DIR = "data/raw/deltas"
+STATUS_PATH = "data/raw/daemon_status.json"
+
+class ScrapeDaemon:
+    """Resident scraper running scheduled incremental scrapes
+
+    Each cycle re-reads the app registry, lets the velocity scheduler pick
+    the due apps of every source, scrapes them incrementally into the raw store and emits
+    the cycle's new rows as a timestamped delta file in DELTA_DIR for
+    downstream stages, plus a changes delta holding the new versions of
+    reviews edited since they were ingested. Progress is published to a
+    JSON status file and cumulative scrape metrics are exported after every
+    cycle. SIGTERM/SIGINT stop the daemon after the current cycle.
+    """
+
+    def __init__(self, interval_seconds=900, request_budget=100, scrape_options=None,
+                 delta_dir=DELTA_DIR, status_path=STATUS_PATH, metrics_dir=METRICS_DIR):
+        self.interval_seconds = interval_seconds
+        self.request_budget = request_budget
+        self.scrape_options = scrape_options or {}
+        self.delta_dir = Path(delta_dir)
+        self.status_path = Path(status_path)
+        self.metrics_dir = metrics_dir
+        self.metrics = ScrapeMetrics()
+        self._stop = threading.Event()
+        self.status = {
+            "pid": os.getpid(),
+            "state": "starting",
+            "started_at": datetime.now().isoformat(),
+            "cycles": 0,
+            "last_cycle_at": None,
+            "next_cycle_at": None,
+            "last_apps": [],
+            "last_reviews": 0,
+            "last_delta": None,
+            "last_changes_delta": None,
+            "last_error": None,
+            "limiters": {},
+        }
+
+    def stop(self, *_):
+        logging.info("Shutdown requested; finishing the current cycle")
+        self._stop.set()
+        self._write_status(state="stopping")
+
+    def _write_status(self, **updates):
+        self.status.update(updates, updated_at=datetime.now().isoformat())
+        self.status_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.status_path.parent / f".{self.status_path.name}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.status, f, indent=2)
+        os.replace(tmp_path, self.status_path)
+
+    def run_cycle(self):
+        """Scrape the due apps once and emit their delta file"""
+        schedule_state = load_schedule_state()
+        locales = self.scrape_options.get("locales") or scraper.LOCALES
+        due = scraper.plan_sources(load_sources(REGISTRY_PATH), schedule_state, self.request_budget, locales,
+                                   self.scrape_options.get("partition_by_rating", False))
+        keys = [app_key(name, app_id) for name, apps in due.items() for app_id in apps.values()]
+        if not keys:
+            logging.info("No apps due this cycle")
+            return None, 0
+
+        connectors = [
+            make_connector(name, apps, locales=scraper.source_locales(name, locales))
+            for name, apps in due.items()
+            if name != PLAY_SOURCE and apps
+        ]
+        self._write_status(state="scraping", last_apps=keys)
+        logging.info(f"Scraping {len(keys)} apps: {', '.join(keys)}")
+        sink, counts = scraper.run_scrape(due.get(PLAY_SOURCE, {}), incremental=True, sources=connectors,
+                                          metrics=self.metrics, **self.scrape_options)
+        for app_id, written in counts.items():
+            record_scrape(schedule_state, app_id, written)
+        save_schedule_state(schedule_state)
+
+        # A cycle resuming a failed one also owns the parts that attempt committed
+        stamp = f"{datetime.now():%Y%m%dT%H%M%S}_{sink.run_id}"
+        change_files = sink.change_files()
+        if change_files:
+            changes_path = self.delta_dir / f"review_changes_{stamp}.parquet"
+            changed = write_delta(change_files, changes_path, sink.changes_root)
+            self.status["last_changes_delta"] = str(changes_path)
+            logging.info(f"Emitted {changed} edited reviews to {changes_path}")
+
+        files = sink.run_files()
+        delta_path = None
+        rows = 0
+        if files:
+            delta_path = self.delta_dir / f"reviews_delta_{stamp}.parquet"
+            rows = write_delta(files, delta_path, sink.root)
+            logging.info(f"Emitted {rows} new reviews to {delta_path}")
+        # Only once the deltas hold them may this cycle's parts be merged away
+        merged = scraper.compact_raw_store()
+        if merged:
+            logging.info(f"Compacted away {merged} small part files")
+        return delta_path, rows
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        logging.info(f"Scrape daemon started (pid {os.getpid()}, every {self.interval_seconds}s)")
+
+        while not self._stop.is_set():
+            cycle_started = datetime.now()
+            try:
+                delta_path, rows = self.run_cycle()
+                self.status.update(last_reviews=rows, last_error=None)
+                if delta_path is not None:
+                    self.status["last_delta"] = str(delta_path)
+            except Exception as e:
+                logging.error(f"Scrape cycle failed: {e}")
+                self.status["last_error"] = "".join(traceback.format_exception_only(type(e), e)).strip()
+
+            self.metrics.export(self.metrics_dir)
+            next_cycle = cycle_started + timedelta(seconds=self.interval_seconds)
+            self._write_status(
+                state="stopping" if self._stop.is_set() else "idle",
+                cycles=self.status["cycles"] + 1,
+                last_cycle_at=cycle_started.isoformat(),
+                next_cycle_at=next_cycle.isoformat(),
+                limiters=scraper.limiter_stats()
+            )
+            self._stop.wait(max(0.0, (next_cycle - datetime.now()).total_seconds()))
+
+        self._write_status(state="stopped", next_cycle_at=None)
+        logging.info("Scrape daemon stopped")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run scheduled incremental scrapes as a resident daemon")
+    parser.add_argument("--interval", type=int, default=900, help="seconds between cycle starts")
+    parser.add_argument("--request-budget", type=int, default=100,
+                        help="estimated requests the scheduler may spend per cycle")
+    parser.add_argument("--workers", type=int, default=scraper.MAX_WORKERS)
+    parser.add_argument("--per-app-concurrency", type=int, default=scraper.PER_APP_CONCURRENCY)
+    parser.add_argument("--partition-by-rating", action="store_true")
+    parser.add_argument("--locales", type=scraper.parse_locales, default=scraper.LOCALES)
+    parser.add_argument("--shared-budget", default=DEFAULT_BUDGET_PATH, metavar="PATH",
+                        help="host-wide rate budget file shared with every other scraper process")
+    parser.add_argument("--no-shared-budget", dest="shared_budget", action="store_const", const=None,
+                        help="limit only this process's own requests, ignoring the host-wide budget")
+    parser.add_argument("--shared-rate", type=float, default=2.0,
+                        help="initial requests/sec of the shared budget when it is first created")
+    parser.add_argument("--delta-dir", default=DELTA_DIR)
+    parser.add_argument("--status-file", default=STATUS_PATH)
+    parser.add_argument("--metrics-dir", default=METRICS_DIR)
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    daemon = ScrapeDaemon(
+        interval_seconds=args.interval,
+        request_budget=args.request_budget,
+        scrape_options={
+            "max_workers": args.workers,
+            "per_app_concurrency": args.per_app_concurrency,
+            "partition_by_rating": args.partition_by_rating,
+            "locales": args.locales,
+            "limiter_factory": host_limiter_factory(args.shared_budget, args.shared_rate),
+        },
+        delta_dir=args.delta_dir,
+        status_path=args.status_file,
+        metrics_dir=args.metrics_dir
+    )
+    daemon.run()
@@ -0,0 +1,208 @@
+# scripts/scrape_metrics.py
+from pathlib import Path
+import json
+import os
+import threading
+import time
+from rate_limiter import is_throttle_error
+from source_connectors import PLAY_SOURCE, app_key
+
+METRICS_DIR = "data/raw/metrics"
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _new_app_metrics():
+    return {
+        "pages": 0,
+        "reviews": 0,
+        "payload_bytes": 0,
+        "requests": {"ok": 0, "throttled": 0, "error": 0},
+        "latency_buckets": [0] * len(LATENCY_BUCKETS),
+        "latency_sum": 0.0,
+        "latency_count": 0,
+        "retries": 0,
+        "throttles": 0,
+        "limiter_rate": None,
+    }
+
+class ScrapeMetrics:
+    """Thread-safe per-app counters and latency histograms for the scraper
+
+    Counters are cumulative for the life of the object (a single run, or a
+    whole daemon), matching Prometheus counter semantics. Retry, throttle
+    and rate figures are taken from the rate limiters via observe_limiters.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self._apps = {}
+        self._transport = None
+        self._lock = threading.Lock()
+
+    def _app(self, app_id):
+        if app_id not in self._apps:
+            self._apps[app_id] = _new_app_metrics()
+        return self._apps[app_id]
+
+    def observe_request(self, app_id, seconds, outcome, page=None, payload_bytes=0):
+        """Record one backend request, with the page and response bytes it returned"""
+        with self._lock:
+            app = self._app(app_id)
+            app["requests"][outcome] += 1
+            app["latency_sum"] += seconds
+            app["latency_count"] += 1
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    app["latency_buckets"][i] += 1
+            if page is not None:
+                app["pages"] += 1
+                app["reviews"] += len(page)
+                app["payload_bytes"] += payload_bytes
+
+    def observe_limiters(self, stats):
+        """Copy retry/throttle counters and rates from scraper.limiter_stats()"""
+        with self._lock:
+            for app_id, limiter in stats.items():
+                app = self._app(app_id)
+                app["retries"] = limiter.get("retries", 0)
+                app["throttles"] = limiter.get("throttles", 0)
+                app["limiter_rate"] = limiter.get("rate")
+
+    def observe_transport(self, stats):
+        """Copy connection pool counters from http_pool.pool_stats()"""
+        with self._lock:
+            self._transport = dict(stats) if stats else None
+
+    def snapshot(self):
+        """JSON-serialisable view of every metric, with derived rates"""
+        with self._lock:
+            elapsed = max(time.time() - self.started, 1e-9)
+            apps = json.loads(json.dumps(self._apps))
+            transport = dict(self._transport) if self._transport else None
+        for app in apps.values():
+            app["reviews_per_sec"] = round(app["reviews"] / elapsed, 3)
+            app["pages_per_sec"] = round(app["pages"] / elapsed, 3)
+            app["latency_avg"] = round(app["latency_sum"] / app["latency_count"], 4) if app["latency_count"] else None
+        return {"started": self.started, "elapsed_seconds": round(elapsed, 3), "apps": apps, "transport": transport}
+
+    def to_prometheus(self):
+        """Render the metrics in the Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{k}="{v}"' for k, v in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}")
+
+        apps = snapshot["apps"]
+        metric("scraper_pages_total", "counter", "Review pages fetched.",
+               [({"app": a}, m["pages"]) for a, m in apps.items()])
+        metric("scraper_reviews_total", "counter", "Reviews fetched.",
+               [({"app": a}, m["reviews"]) for a, m in apps.items()])
+        metric("scraper_payload_bytes_total", "counter", "Bytes of raw review page responses received.",
+               [({"app": a}, m["payload_bytes"]) for a, m in apps.items()])
+        metric("scraper_requests_total", "counter", "Page requests by outcome.",
+               [({"app": a, "outcome": o}, n) for a, m in apps.items() for o, n in m["requests"].items()])
+        metric("scraper_retries_total", "counter", "Requests retried after throttling or transient errors.",
+               [({"app": a}, m["retries"]) for a, m in apps.items()])
+        metric("scraper_throttles_total", "counter", "Throttled responses seen by the rate limiter.",
+               [({"app": a}, m["throttles"]) for a, m in apps.items()])
+        metric("scraper_reviews_per_second", "gauge", "Reviews fetched per second since start.",
+               [({"app": a}, m["reviews_per_sec"]) for a, m in apps.items()])
+        metric("scraper_limiter_rate", "gauge", "Current rate limiter requests/sec.",
+               [({"app": a}, m["limiter_rate"]) for a, m in apps.items() if m["limiter_rate"] is not None])
+
+        lines.append("# HELP scraper_request_latency_seconds Page request latency.")
+        lines.append("# TYPE scraper_request_latency_seconds histogram")
+        for a, m in apps.items():
+            for bound, count in zip(LATENCY_BUCKETS, m["latency_buckets"]):
+                lines.append(f'scraper_request_latency_seconds_bucket{{app="{a}",le="{bound}"}} {count}')
+            lines.append(f'scraper_request_latency_seconds_bucket{{app="{a}",le="+Inf"}} {m["latency_count"]}')
+            lines.append(f'scraper_request_latency_seconds_sum{{app="{a}"}} {m["latency_sum"]}')
+            lines.append(f'scraper_request_latency_seconds_count{{app="{a}"}} {m["latency_count"]}')
+
+        transport = snapshot["transport"]
+        if transport:
+            for name, kind, help_text, value in (
+                ("scraper_http_requests_total", "counter", "HTTP requests sent through the connection pool.",
+                 transport["requests"]),
+                ("scraper_http_connections_opened_total", "counter", "New HTTPS connections opened.",
+                 transport["connections_opened"]),
+                ("scraper_http_connections_reused_total", "counter", "Requests served on a kept-alive connection.",
+                 transport["reused"]),
+                ("scraper_http_stale_retries_total", "counter", "Requests retried after the server closed an idle connection.",
+                 transport["stale_retries"]),
+                ("scraper_http_connection_reuse_ratio", "gauge", "Share of requests that reused a pooled connection.",
+                 transport["reuse_rate"]),
+                ("scraper_http_idle_connections", "gauge", "Keep-alive connections currently idle in the pool.",
+                 transport["idle"]),
+            ):
+                if value is not None:
+                    lines.append(f"# HELP {name} {help_text}")
+                    lines.append(f"# TYPE {name} {kind}")
+                    lines.append(f"{name} {value}")
+
+        lines.append("# HELP scraper_elapsed_seconds Seconds since the metrics were started.")
+        lines.append("# TYPE scraper_elapsed_seconds gauge")
+        lines.append(f"scraper_elapsed_seconds {snapshot['elapsed_seconds']}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, metrics_dir=METRICS_DIR):
+        """Atomically write scraper.prom (textfile collector) and scraper.json"""
+        metrics_dir = Path(metrics_dir)
+        metrics_dir.mkdir(parents=True, exist_ok=True)
+        for name, content in (
+            ("scraper.prom", self.to_prometheus()),
+            ("scraper.json", json.dumps(self.snapshot(), indent=2)),
+        ):
+            tmp_path = metrics_dir / f".{name}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(tmp_path, metrics_dir / name)
+
+class MeteredBackend:
+    """Fetch backend wrapper timing every request into ScrapeMetrics
+
+    Pages of backends exposing fetch_raw (FastPlayBackend) are fetched raw
+    and decoded here, so the response length is counted as payload bytes.
+    Requests are counted per app_key of the given source.
+    """
+
+    def __init__(self, inner, metrics, source=PLAY_SOURCE):
+        self.inner = inner
+        self.metrics = metrics
+        self.source = source
+
+    def fetch_page(self, app_id, lang, country, score, count, token=None):
+        key = app_key(self.source, app_id)
+        started = time.perf_counter()
+        payload_bytes = 0
+        try:
+            if hasattr(self.inner, "fetch_raw"):
+                payload = self.inner.fetch_raw(app_id, lang, country, score, count, token)
+                payload_bytes = len(payload.encode("utf-8") if isinstance(payload, str) else payload)
+                page, next_token = self.inner.decode(payload, lang, country, score, count)
+            else:
+                page, next_token = self.inner.fetch_page(app_id, lang, country, score, count, token)
+        except Exception as e:
+            outcome = "throttled" if is_throttle_error(e) else "error"
+            self.metrics.observe_request(key, time.perf_counter() - started, outcome)
+            raise
+        self.metrics.observe_request(key, time.perf_counter() - started, "ok", page, payload_bytes)
+        return page, next_token
+
+    def fetch_app_metadata(self, app_id, lang, country):
+        key = app_key(self.source, app_id)
+        started = time.perf_counter()
+        try:
+            metadata = self.inner.fetch_app_metadata(app_id, lang, country)
+        except Exception as e:
+            outcome = "throttled" if is_throttle_error(e) else "error"
+            self.metrics.observe_request(key, time.perf_counter() - started, outcome)
+            raise
+        self.metrics.observe_request(key, time.perf_counter() - started, "ok")
+        return metadata
@@ -1,43 +1,972 @@
 # scraper.py
-from google_play_scraper import reviews_all
-import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from functools import partial
+from itertools import islice
+from pathlib import Path
+import argparse
+import hashlib
+import os
+import threading
+from app_metadata import APP_METADATA_PATH, is_unchanged, load_app_metadata, record_metadata, save_app_metadata
+from app_registry import (load_registry, load_schedule_state, load_sources, plan_scrape, record_scrape,
+                          save_schedule_state)
+from fetch_backends import FastPlayBackend, PlayBackend, RecordingBackend, ReplayBackend
+from google_play_scraper.features.reviews import MAX_COUNT_EACH_FETCH
+from http_pool import DEFAULT_POOL_SIZE, pool_stats
+from page_decoder import page_column, select_reviews
+from raw_store import CHANGES_DIR, RAW_DIR, RAW_SCHEMA, RawReviewSink, compact_store
+from rate_limiter import DEFAULT_BUDGET_PATH, TokenBucketLimiter, host_limiter_factory
+from review_sample import SAMPLE_DIR, SCORES, bucket_weights, save_weights
+from review_fingerprints import FINGERPRINT_DB_PATH, ReviewFingerprints
+from scrape_metrics import METRICS_DIR, MeteredBackend, ScrapeMetrics
+from seen_filter import SEEN_FILTER_PATH, SeenReviewFilter
+from source_connectors import (APP_STORE_PAGE_SIZE, APP_STORE_SOURCE, PLAY_SOURCE, SOURCE_LABELS, SourceConnector,
+                               app_key, default_backend, make_connector)
+from work_queue import LEASE_SECONDS, WORK_QUEUE_DIR, WorkQueue, default_worker_id
 from tqdm import tqdm
 import json
+import pyarrow as pa
 
-BANK_APPS = {
-    "CBE": "com.combanketh.mobilebanking",
-    "BOA": "com.boa.boaMobileBanking",
-    "Dashen": "com.dashen.dashensuperapp"
-}
-
-def scrape_reviews():
-    all_reviews = []
-    
-    for bank_name, app_id in BANK_APPS.items():
-        print(f"Scraping {bank_name} reviews...")
-        reviews = reviews_all(
-            app_id,
-            sleep_milliseconds=1000,  # Avoid rate limiting
-            lang='en',
-            country='et',
-            sort=1  # Sort by newest
+try:
+    import fcntl
+except ImportError:  # Windows has no flock; concurrent watermark updates are then not serialised
+    fcntl = None
+
+# Tracked apps as {bank: app_id}, maintained in config/apps.json
+BANK_APPS = load_registry()
+
+# Number of apps scraped at the same time
+MAX_WORKERS = 8
+# Maximum in-flight paging streams against a single app id
+PER_APP_CONCURRENCY = 5
+
+# Reviews requested per continuation-token page; google_play_scraper splits
+# larger counts into several requests
+PAGE_SIZE = MAX_COUNT_EACH_FETCH
+
+# (lang, country) pairs scraped for every app; Play serves different reviews per locale
+LOCALES = [("en", "et"), ("am", "et")]
+
+WATERMARK_PATH = "data/raw/watermarks.json"
+CHECKPOINT_DIR = "data/raw/checkpoints"
+
+_app_slots = {}
+_app_slots_lock = threading.Lock()
+
+def _app_slot(key, limit):
+    """Semaphore capping concurrent work against one app (keyed by app_key)"""
+    with _app_slots_lock:
+        if key not in _app_slots:
+            _app_slots[key] = threading.BoundedSemaphore(limit)
+        return _app_slots[key]
+
+_app_limiters = {}
+
+def _app_limiter(key, limiter_factory):
+    """Rate limiter shared by every request against one app (keyed by app_key)"""
+    with _app_slots_lock:
+        if key not in _app_limiters:
+            _app_limiters[key] = limiter_factory()
+        return _app_limiters[key]
+
+def limiter_stats():
+    """Current rate and retry counters of every app's limiter"""
+    with _app_slots_lock:
+        limiters = dict(_app_limiters)
+    return {key: limiter.stats() for key, limiter in limiters.items()}
+
+def load_watermarks(path=WATERMARK_PATH):
+    """Load the newest ingested (at, reviewId) per app, keyed by app_key"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return {
+            key: {"at": datetime.fromisoformat(mark["at"]), "review_id": mark["review_id"]}
+            for key, mark in json.load(f).items()
+        }
+
+def save_watermarks(watermarks, path=WATERMARK_PATH):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                key: {"at": mark["at"].isoformat(), "review_id": mark["review_id"]}
+                for key, mark in watermarks.items()
+            },
+            f,
+            indent=2
+        )
+    os.replace(tmp_path, path)
+
+def _is_ingested(at, review_id, watermark):
+    """True once paging (newest first) reaches the stored watermark"""
+    if watermark is None or not at:
+        return False
+    # The id only counts at the watermark's own timestamp: an edited watermark
+    # review moves to the top with a newer one and must not stop paging there
+    return at < watermark["at"] or (at == watermark["at"] and review_id == watermark["review_id"])
+
+def _stream_key(key, locale, score=None):
+    """Checkpoint key of one paging stream (app x locale x optional rating)"""
+    lang, country = locale
+    stream_key = f"{key}/{lang}_{country}"
+    return stream_key if score is None else f"{stream_key}.rating{score}"
+
+def _checkpoint_path(stream_key):
+    return Path(CHECKPOINT_DIR) / f"{stream_key}.json"
+
+def load_checkpoint(stream_key, incremental):
+    """Return the state saved by an interrupted run, or None
+
+    A checkpoint written by a run in the other mode is discarded.
+    """
+    path = _checkpoint_path(stream_key)
+    if not path.exists():
+        return None
+    with open(path, encoding="utf-8") as f:
+        state = json.load(f)
+    if state.get("incremental") != incremental:
+        path.unlink()
+        return None
+    if state.get("watermark"):
+        state["watermark"]["at"] = datetime.fromisoformat(state["watermark"]["at"])
+    return state
+
+def save_checkpoint(stream_key, state):
+    """Atomically record how far a stream has been written to the sink"""
+    path = _checkpoint_path(stream_key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    serialisable = dict(state)
+    if state.get("watermark"):
+        serialisable["watermark"] = dict(state["watermark"], at=state["watermark"]["at"].isoformat())
+
+    tmp_path = path.with_suffix(".json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(serialisable, f)
+    os.replace(tmp_path, path)
+
+def _app_checkpoints(key):
+    return list((Path(CHECKPOINT_DIR) / key).glob("*.json"))
+
+def clear_checkpoints(key):
+    """Remove the checkpoints of every stream of an app (keyed by app_key)"""
+    for path in _app_checkpoints(key):
+        path.unlink()
+
+def clear_stream_checkpoints(key, locales, scores):
+    """Remove the checkpoints of the given streams of an app only"""
+    for locale in locales:
+        for score in scores:
+            _checkpoint_path(_stream_key(key, locale, score)).unlink(missing_ok=True)
+
+def iter_app_pages(app_id, limiter, backend, watermark=None, token=None, score=None, locale=LOCALES[0]):
+    """Yield (reviews, token) pages newest first, stopping at the watermark
+
+    Pages come from the fetch backend, paced and retried by the limiter.
+    A score restricts paging to reviews with that star rating.
+    """
+    lang, country = locale
+    while True:
+        page, token = limiter.call(backend.fetch_page, app_id, lang, country, score, PAGE_SIZE, token)
+        for index, (at, review_id) in enumerate(zip(page_column(page, "at"), page_column(page, "reviewId"))):
+            if _is_ingested(at, review_id, watermark):
+                yield page[:index], None
+                return
+        last_page = not page or token is None
+        yield page, None if last_page else token
+        if last_page:
+            return
+
+def _timestamps(values):
+    """timestamp[s] array from datetimes (None as null), converted in one call"""
+    # Arrow's native converter is several times faster than numpy's object -> datetime64 path
+    return pa.array(values, type=pa.timestamp("us")).cast(pa.timestamp("s"), safe=False)
+
+def _page_table(bank_name, app_id, locale, page, source=SOURCE_LABELS[PLAY_SOURCE]):
+    """Convert a page of reviews into a RAW_SCHEMA table column by column
+
+    No per-review record is built: each field becomes one column, and the
+    timestamps (and the partition dates derived from them) are converted
+    as whole arrays.
+    """
+    n = len(page)
+    at = _timestamps(page_column(page, "at"))
+    columns = {
+        "review_id": page_column(page, "reviewId"),
+        "bank": [bank_name] * n,
+        "app_id": [app_id] * n,
+        "review": page_column(page, "content"),
+        "rating": [score or 0 for score in page_column(page, "score")],
+        "date": at.cast(pa.date32()),
+        "at": at,
+        "thumbs_up": page_column(page, "thumbsUpCount"),
+        "review_created_version": page_column(page, "reviewCreatedVersion"),
+        "reply_content": page_column(page, "replyContent"),
+        "replied_at": _timestamps(page_column(page, "repliedAt")),
+        "lang": [locale[0]] * n,
+        "country": [locale[1]] * n,
+        "source": [source] * n,
+    }
+    return pa.Table.from_pydict(columns, schema=RAW_SCHEMA)
+
+class SeenReviews:
+    """Thread-safe set of reviewIds already written during this run
+
+    Ids are kept as 64-bit blake2b digests rather than the raw id strings,
+    which keeps the set several times smaller when many overlapping streams
+    (locales, rating buckets) are merged.
+    """
+
+    def __init__(self):
+        self._digests = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _digest(review_id):
+        return int.from_bytes(hashlib.blake2b(review_id.encode("utf-8"), digest_size=8).digest(), "little")
+
+    def filter_new(self, page):
+        """Return the reviews of a page whose reviewId has not been seen yet"""
+        digests = [
+            self._digest(review_id) if review_id else None
+            for review_id in page_column(page, "reviewId")
+        ]
+        with self._lock:
+            fresh = []
+            for index, digest in enumerate(digests):
+                if digest is not None:
+                    if digest in self._digests:
+                        continue
+                    self._digests.add(digest)
+                fresh.append(index)
+        return page if len(fresh) == len(digests) else select_reviews(page, fresh)
+
+    def __len__(self):
+        return len(self._digests)
+
+def _split_known(app_id, page, known, fingerprints=None):
+    """Split a page into (new, changed) reviews against the ingested history
+
+    The Bloom filter clears most new reviews without a lookup. Reviews it
+    reports as known are checked against their exact fingerprints, which
+    corrects Bloom false positives and finds reviews edited since ingestion.
+    """
+    maybe_known = [index for index, flag in enumerate(known.known_flags(app_id, page)) if flag]
+    if fingerprints is None:
+        statuses = ["unchanged"] * len(maybe_known)
+    else:
+        statuses = fingerprints.classify(select_reviews(page, maybe_known))
+    status_of = dict(zip(maybe_known, statuses))
+
+    new, changed = [], []
+    for index in range(len(page)):
+        status = status_of.get(index, "new")
+        if status == "new":
+            new.append(index)
+        elif status == "changed":
+            changed.append(index)
+    return select_reviews(page, new), select_reviews(page, changed)
+
+def scrape_stream(bank_name, app_id, sink, seen, limiter, backend, watermark=None, incremental=False, score=None,
+                  per_app_concurrency=PER_APP_CONCURRENCY, locale=LOCALES[0], known=None, fingerprints=None,
+                  source=SOURCE_LABELS[PLAY_SOURCE], stop=None, key=None, stops_at_watermark=True):
+    """Stream one paging stream of an app into the sink
+
+    Returns the number of reviews written and the newest review seen by the
+    stream as a watermark.
+    """
+    key = key or app_id
+    stream_key = _stream_key(key, locale, score)
+    label = f"{bank_name} [{locale[0]}-{locale[1]}]" + ("" if score is None else f" ({score} stars)")
+    if source != SOURCE_LABELS[PLAY_SOURCE]:
+        label = f"{label} from {source}"
+    state = load_checkpoint(stream_key, incremental) or {
+        "incremental": incremental, "run_id": sink.run_id, "pages": 0, "reviews": 0, "token": None,
+        "watermark": None, "done": False
+    }
+    if state["done"] or (state["pages"] and state["token"] is None):
+        print(f"Skipping {label}: already completed by the interrupted run")
+        return 0, state["watermark"]
+    if state["pages"]:
+        print(f"Resuming {label} after {state['pages']} pages ({state['reviews']} reviews)")
+
+    written = 0
+    edited = 0
+    with _app_slot(key, per_app_concurrency):
+        print(f"Scraping {label} reviews...")
+        for page, token in iter_app_pages(app_id, limiter, backend, watermark, state["token"], score, locale):
+            if stop is not None and stop.is_set():
+                # Left unfinished: whoever now owns the stream resumes it from its checkpoint
+                print(f"Stopping {label}: its work was handed to another worker")
+                return written, state["watermark"]
+            if page and state["watermark"] is None and page[0].get("at"):
+                state["watermark"] = {"at": page[0]["at"], "review_id": page[0].get("reviewId")}
+            changed = []
+            if known is not None:
+                fresh, changed = _split_known(app_id, page, known, fingerprints)
+                if page and not fresh and not changed and stops_at_watermark:
+                    print(f"Stopping {label}: a full page is already in the raw store")
+                    break
+                page = fresh
+            page = seen.filter_new(page)
+            changed = seen.filter_new(changed)
+            if known is not None:
+                known.add(app_id, page)
+            sink.write(_page_table(bank_name, app_id, locale, page, source))
+            if changed:
+                sink.write_changes(_page_table(bank_name, app_id, locale, changed, source))
+            if fingerprints is not None:
+                sink.on_commit(partial(fingerprints.update, page))
+                if changed:
+                    sink.on_commit(partial(fingerprints.update, changed))
+            written += len(page)
+            edited += len(changed)
+            state.update(pages=state["pages"] + 1, reviews=state["reviews"] + len(page), token=token)
+            sink.on_commit(partial(save_checkpoint, stream_key, dict(state)))
+
+    if edited:
+        print(f"Found {edited} edited {label} reviews")
+    state.update(done=True, token=None)
+    sink.on_commit(partial(save_checkpoint, stream_key, dict(state)))
+    return written, state["watermark"]
+
+def scrape_app(bank_name, app_id, sink, watermark=None, incremental=False,
+               per_app_concurrency=PER_APP_CONCURRENCY, limiter_factory=TokenBucketLimiter,
+               partition_by_rating=False, locales=None, backend=None, known=None, fingerprints=None,
+               scores=None, source=SOURCE_LABELS[PLAY_SOURCE], stop=None, key=None, stops_at_watermark=True):
+    """Stream one app's reviews newer than its watermark into the sink
+
+    The app is paged once per locale, and with partition_by_rating each
+    locale is further split into five streams (one per star rating). Streams
+    are paged in parallel, up to per_app_concurrency at a time, and merged
+    with reviewId deduplication so overlapping locales write each review
+    once. scores overrides the rating streams, e.g. to page a single bucket.
+    source is written to the raw store's source column. Returns the number
+    of reviews written and the app's new watermark.
+    """
+    locales = locales or LOCALES
+    backend = backend or FastPlayBackend()
+    if scores is None:
+        scores = [1, 2, 3, 4, 5] if partition_by_rating else [None]
+    streams = [(locale, score) for locale in locales for score in scores]
+    key = key or app_id
+    limiter = _app_limiter(key, limiter_factory)
+    seen = SeenReviews()
+
+    with ThreadPoolExecutor(max_workers=max(1, min(per_app_concurrency, len(streams)))) as pool:
+        futures = [
+            pool.submit(scrape_stream, bank_name, app_id, sink, seen, limiter, backend, watermark, incremental,
+                        score, per_app_concurrency, locale, known, fingerprints, source, stop, key,
+                        stops_at_watermark)
+            for locale, score in streams
+        ]
+        results = [future.result() for future in futures]
+
+    written = sum(count for count, _ in results)
+    stream_marks = [mark for _, mark in results if mark is not None]
+    if not stream_marks:
+        return written, watermark
+    return written, max(stream_marks, key=lambda mark: mark["at"])
+
+def scrape_reviews(sink, apps=None, max_workers=MAX_WORKERS, per_app_concurrency=PER_APP_CONCURRENCY,
+                   incremental=False, limiter_factory=TokenBucketLimiter, partition_by_rating=False,
+                   locales=None, backend=None, metrics=None, known=None, fingerprints=None, app_metadata=None,
+                   source=SOURCE_LABELS[PLAY_SOURCE], source_name=PLAY_SOURCE, stops_at_watermark=True):
+    """Scrape all registered apps concurrently into a shared sink
+
+    Returns the updated watermarks and the number of reviews written per
+    app_key.
+    """
+    apps = BANK_APPS if apps is None else apps
+    backend = backend or FastPlayBackend()
+    if metrics is not None:
+        backend = MeteredBackend(backend, metrics, source_name)
+    watermarks = load_watermarks()
+    counts = {}
+    keys = {bank_name: app_key(source_name, app_id) for bank_name, app_id in apps.items()}
+
+    def scrape_if_changed(bank_name, app_id, *args):
+        """(scrape_app result or None when skipped, metadata signature or None)"""
+        current = None
+        if app_metadata is not None:
+            lang, country = (locales or LOCALES)[0]
+            limiter = _app_limiter(keys[bank_name], limiter_factory)
+            current = limiter.call(backend.fetch_app_metadata, app_id, lang, country)
+            if is_unchanged(app_metadata.get(keys[bank_name]), current):
+                return None, current
+        return scrape_app(bank_name, app_id, *args), current
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(apps)))) as pool:
+        futures = {
+            pool.submit(
+                scrape_if_changed,
+                bank_name,
+                app_id,
+                sink,
+                watermarks.get(keys[bank_name]) if incremental and stops_at_watermark else None,
+                incremental,
+                per_app_concurrency,
+                limiter_factory,
+                partition_by_rating,
+                locales,
+                backend,
+                known,
+                fingerprints,
+                None,
+                source,
+                None,
+                keys[bank_name],
+                stops_at_watermark
+            ): bank_name
+            for bank_name, app_id in apps.items()
+        }
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Apps"):
+            bank_name = futures[future]
+            key = keys[bank_name]
+            result, current = future.result()
+            if result is None:
+                counts[key] = 0
+                print(f"Skipped {bank_name}: metadata unchanged since its last scrape")
+                continue
+            written, watermark = result
+            if current is not None:
+                record_metadata(app_metadata, key, current)
+            counts[key] = written
+            if watermark is not None:
+                watermarks[key] = watermark
+            stats = _app_limiter(key, limiter_factory).stats()
+            print(f"Finished {bank_name}: {written} reviews "
+                  f"(rate {stats['rate']}/s, {stats['retries']} retries, {stats['throttles']} throttles)")
+
+    if metrics is not None:
+        metrics.observe_limiters(limiter_stats())
+        metrics.observe_transport(pool_stats())
+    return watermarks, counts
+
+def scrape_sources(sink, connectors, incremental=False, partition_by_rating=False, metrics=None, known=None,
+                   fingerprints=None, app_metadata=None):
+    """Scrape the apps of every source connector at once into one shared sink
+
+    Each connector runs scrape_reviews in its own thread with its own
+    backend, app concurrency and limiters, so a slow or throttled source
+    never holds up the others, and every source shares the sink, dedup
+    state and change stream. Sources without a rating filter are paged
+    unpartitioned. Returns the merged watermarks and per-app review counts.
+    """
+    watermarks = load_watermarks()
+    counts = {}
+    with ThreadPoolExecutor(max_workers=max(1, len(connectors))) as pool:
+        futures = {
+            pool.submit(
+                scrape_reviews,
+                sink,
+                apps=connector.apps,
+                max_workers=connector.max_workers,
+                per_app_concurrency=connector.per_app_concurrency,
+                incremental=incremental,
+                limiter_factory=connector.limiter_factory,
+                partition_by_rating=partition_by_rating and connector.supports_score_filter,
+                locales=connector.locales,
+                backend=connector.backend,
+                metrics=metrics,
+                known=known,
+                fingerprints=fingerprints,
+                app_metadata=app_metadata,
+                source=connector.label,
+                source_name=connector.name,
+                stops_at_watermark=connector.stops_at_watermark
+            ): connector
+            for connector in connectors
+        }
+        for future in as_completed(futures):
+            connector = futures[future]
+            source_marks, source_counts = future.result()
+            # Each source only moves the watermarks of its own apps
+            for app_id in connector.apps.values():
+                key = app_key(connector.name, app_id)
+                if key in source_marks:
+                    watermarks[key] = source_marks[key]
+            counts.update(source_counts)
+    return watermarks, counts
+
+def play_connector(apps, backend=None, max_workers=MAX_WORKERS, per_app_concurrency=PER_APP_CONCURRENCY,
+                   limiter_factory=TokenBucketLimiter, locales=None):
+    """Google Play source connector"""
+    return SourceConnector(PLAY_SOURCE, apps, backend or FastPlayBackend(), locales=locales, max_workers=max_workers,
+                           per_app_concurrency=per_app_concurrency, limiter_factory=limiter_factory)
+
+def interrupted_run_id(keys, incremental):
+    """Run id of an interrupted run in the same mode over any of the app keys, or None"""
+    for key in keys:
+        for path in _app_checkpoints(key):
+            with open(path, encoding="utf-8") as f:
+                state = json.load(f)
+            if state.get("incremental") == incremental and state.get("run_id"):
+                return state["run_id"]
+    return None
+
+def unscraped_registry_apps(keys):
+    """app_keys of every registered source's apps missing from keys"""
+    registered = {app_key(source, app_id) for source, apps in load_sources().items() for app_id in apps.values()}
+    return registered - set(keys)
+
+def run_scrape(apps, incremental=False, skip_unchanged=False, sources=None, partition_by_rating=False, metrics=None,
+               **options):
+    """Scrape Play apps, and the apps of any other source connectors, into the raw store
+
+    A full scrape must cover every app of every registered source and raises
+    ValueError otherwise. Returns the closed sink and the per-app review
+    counts.
+    """
+    connectors = [play_connector(apps, **options)] + list(sources or [])
+    keys = [app_key(connector.name, app_id) for connector in connectors for app_id in connector.apps.values()]
+    if not incremental:
+        missing = unscraped_registry_apps(keys)
+        if missing:
+            raise ValueError(
+                f"A full scrape replaces the whole raw store but would not rescrape {', '.join(sorted(missing))}; "
+                "scrape every source or run incrementally"
+            )
+    run_id = interrupted_run_id(keys, incremental)
+    known = fingerprints = app_metadata = None
+    if incremental and skip_unchanged:
+        app_metadata = load_app_metadata()
+    if incremental:
+        known = SeenReviewFilter.open(SEEN_FILTER_PATH, raw_root=RAW_DIR)
+        fingerprints = ReviewFingerprints.open(FINGERPRINT_DB_PATH, raw_root=RAW_DIR, changes_root=CHANGES_DIR)
+    try:
+        with RawReviewSink(RAW_DIR, run_id=run_id, changes_root=CHANGES_DIR) as sink:
+            watermarks, counts = scrape_sources(sink, connectors, incremental=incremental,
+                                                partition_by_rating=partition_by_rating, metrics=metrics, known=known,
+                                                fingerprints=fingerprints, app_metadata=app_metadata)
+    finally:
+        if fingerprints is not None:
+            fingerprints.close()
+    save_watermarks(watermarks)
+    if incremental:
+        known.save()
+        if app_metadata is not None:
+            save_app_metadata(app_metadata)
+    else:
+        sink.prune_other_runs()
+        Path(SEEN_FILTER_PATH).unlink(missing_ok=True)
+        Path(FINGERPRINT_DB_PATH).unlink(missing_ok=True)
+        Path(APP_METADATA_PATH).unlink(missing_ok=True)
+    for key in keys:
+        clear_checkpoints(key)
+    return sink, counts
+
+def sample_stream(bank_name, app_id, sink, seen, limiter, backend, score, locale, pages,
+                  per_app_concurrency=PER_APP_CONCURRENCY):
+    """Write at most pages pages of one app x locale x star-rating stream, newest first
+
+    Returns the number of reviews written.
+    """
+    written = 0
+    with _app_slot(app_id, per_app_concurrency):
+        for page, _ in islice(iter_app_pages(app_id, limiter, backend, score=score, locale=locale), pages):
+            page = seen.filter_new(page)
+            sink.write(_page_table(bank_name, app_id, locale, page))
+            written += len(page)
+    return written
+
+def sample_app(bank_name, app_id, sink, pages, per_app_concurrency=PER_APP_CONCURRENCY,
+               limiter_factory=TokenBucketLimiter, locales=None, backend=None):
+    """Sample up to pages pages per star rating and locale of one app
+
+    The app's rating histogram is fetched first (one metadata request) and
+    turned into per-rating sampling weights with the sampled counts; see
+    review_sample.bucket_weights. Returns those weights.
+    """
+    locales = locales or LOCALES
+    backend = backend or FastPlayBackend()
+    limiter = _app_limiter(app_id, limiter_factory)
+    lang, country = locales[0]
+    metadata = limiter.call(backend.fetch_app_metadata, app_id, lang, country)
+    streams = [(locale, score) for locale in locales for score in SCORES]
+    seen = SeenReviews()
+
+    with ThreadPoolExecutor(max_workers=max(1, min(per_app_concurrency, len(streams)))) as pool:
+        futures = [
+            pool.submit(sample_stream, bank_name, app_id, sink, seen, limiter, backend, score, locale, pages,
+                        per_app_concurrency)
+            for locale, score in streams
+        ]
+        sampled = {}
+        for (_, score), future in zip(streams, futures):
+            sampled[score] = sampled.get(score, 0) + future.result()
+    return bucket_weights(metadata.get("histogram"), sampled)
+
+def run_sample(apps, pages, max_workers=MAX_WORKERS, per_app_concurrency=PER_APP_CONCURRENCY,
+               limiter_factory=TokenBucketLimiter, locales=None, backend=None, metrics=None):
+    """Take a weighted snapshot of every app's newest reviews per star rating
+
+    The sample goes to its own timestamped directory under SAMPLE_DIR (a
+    raw store in reviews/ plus WEIGHTS_FILE) and never touches the raw
+    store, watermarks, checkpoints or seen-review state, so it can run
+    between regular scrapes. Read it back with review_sample.read_sample.
+    Returns the sample directory, the closed sink and the per-app weights.
+    """
+    locales = locales or LOCALES
+    backend = backend or FastPlayBackend()
+    if metrics is not None:
+        backend = MeteredBackend(backend, metrics)
+    sample_dir = Path(SAMPLE_DIR) / datetime.now().strftime("%Y%m%dT%H%M%S")
+    weights = {}
+
+    with RawReviewSink(sample_dir / "reviews") as sink:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(apps)))) as pool:
+            futures = {
+                pool.submit(sample_app, bank_name, app_id, sink, pages, per_app_concurrency, limiter_factory,
+                            locales, backend): bank_name
+                for bank_name, app_id in apps.items()
+            }
+            for future in tqdm(as_completed(futures), total=len(futures), desc="Apps"):
+                bank_name = futures[future]
+                weights[apps[bank_name]] = {"bank": bank_name, "buckets": future.result()}
+                sampled = sum(bucket["sampled"] for bucket in weights[apps[bank_name]]["buckets"].values())
+                print(f"Sampled {bank_name}: {sampled} reviews")
+
+    save_weights(sample_dir, {
+        "pages_per_bucket": pages,
+        "locales": [list(locale) for locale in locales],
+        "apps": weights,
+    })
+    if metrics is not None:
+        metrics.observe_limiters(limiter_stats())
+        metrics.observe_transport(pool_stats())
+    return sample_dir, sink, weights
+
+def make_shards(apps, partition_by_rating=False):
+    """Work-queue shards {shard_id: shard}: one per app, or per app x star rating
+
+    Each shard lists the shard ids of its app as its group, whose watermarks
+    are folded together once all of them are done.
+    """
+    shards = {}
+    for bank_name, app_id in apps.items():
+        scores = [1, 2, 3, 4, 5] if partition_by_rating else [None]
+        group = [app_id if score is None else f"{app_id}.rating{score}" for score in scores]
+        for shard_id, score in zip(group, scores):
+            shards[shard_id] = {"bank": bank_name, "app_id": app_id, "score": score, "group": group}
+    return shards
+
+def compact_raw_store():
+    """Merge the small part files left by scrapes; returns the number merged away"""
+    return compact_store(RAW_DIR) + compact_store(CHANGES_DIR)
+
+def advance_watermarks(marks, path=WATERMARK_PATH):
+    """Move the stored watermarks of marks' app keys forward, never back, under a file lock"""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(f"{path}.lock", "a") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        watermarks = load_watermarks(path)
+        for key, mark in marks.items():
+            if key not in watermarks or mark["at"] > watermarks[key]["at"]:
+                watermarks[key] = mark
+        save_watermarks(watermarks, path)
+
+def group_watermark(records):
+    """App watermark implied by the done records of all of an app's shards, or None
+
+    A rating shard's newest review says nothing about the other ratings,
+    so the app only advances to the oldest of its shards' watermarks.
+    """
+    marks = [record["result"]["watermark"] for record in records if (record.get("result") or {}).get("watermark")]
+    if not marks:
+        return None
+    mark = min(marks, key=lambda mark: mark["at"])
+    return {"at": datetime.fromisoformat(mark["at"]), "review_id": mark["review_id"]}
+
+def enqueue_apps(queue, apps, partition_by_rating=False):
+    """Queue the apps as shards once the previous round has finished
+
+    Returns the number of shards added to the queue.
+    """
+    status = queue.status()
+    if status["pending"] or status["leased"]:
+        print(f"Previous round still running ({status}); not queueing more shards")
+        return 0
+    # Workers fold finished groups themselves; this covers one that died before doing so
+    marks = {}
+    records = queue.drain_done()
+    for app_id in {record["shard"]["app_id"] for record in records}:
+        mark = group_watermark([record for record in records if record["shard"]["app_id"] == app_id])
+        if mark is not None:
+            marks[app_id] = mark
+    advance_watermarks(marks)
+    compact_raw_store()
+    return queue.enqueue(make_shards(apps, partition_by_rating))
+
+def run_worker(queue, worker_id=None, per_app_concurrency=PER_APP_CONCURRENCY, limiter_factory=TokenBucketLimiter,
+               locales=None, backend=None, metrics=None):
+    """Incrementally scrape shards from a shared work queue until it is empty
+
+    Shards are deduplicated against the same seen-review filter,
+    fingerprints and watermarks as run_scrape. Returns the per-app review
+    counts.
+    """
+    worker_id = worker_id or default_worker_id()
+    locales = locales or LOCALES
+    backend = backend or FastPlayBackend()
+    if metrics is not None:
+        backend = MeteredBackend(backend, metrics)
+    known = SeenReviewFilter.open(SEEN_FILTER_PATH, raw_root=RAW_DIR)
+    fingerprints = ReviewFingerprints.open(FINGERPRINT_DB_PATH, raw_root=RAW_DIR, changes_root=CHANGES_DIR)
+    counts = {}
+
+    try:
+        with RawReviewSink(RAW_DIR, changes_root=CHANGES_DIR) as sink:
+            while True:
+                lease = queue.claim(worker_id)
+                if lease is None:
+                    break
+                shard = lease.shard
+                print(f"Worker {worker_id} leased {lease.shard_id}")
+                try:
+                    with queue.keep_alive(lease):
+                        written, watermark = scrape_app(
+                            shard["bank"], shard["app_id"], sink, load_watermarks().get(shard["app_id"]), True,
+                            per_app_concurrency, limiter_factory, locales=locales, backend=backend, known=known,
+                            fingerprints=fingerprints, scores=[shard["score"]], stop=lease.lost
+                        )
+                        sink.flush()
+                except Exception:
+                    queue.release(lease)
+                    raise
+                known.save()
+                if lease.lost.is_set():
+                    print(f"Lease on {lease.shard_id} expired while scraping; it was re-claimed by another worker")
+                    continue
+
+                counts[shard["app_id"]] = counts.get(shard["app_id"], 0) + written
+                result = {
+                    "reviews": written,
+                    "watermark": {"at": watermark["at"].isoformat(), "review_id": watermark["review_id"]}
+                    if watermark else None,
+                }
+                if not queue.complete(lease, result):
+                    print(f"Lease on {lease.shard_id} expired while scraping; it was re-claimed by another worker")
+                    continue
+                clear_stream_checkpoints(shard["app_id"], locales, [shard["score"]])
+                records = queue.finished(shard.get("group", [lease.shard_id]))
+                mark = group_watermark(records) if records else None
+                if mark is not None:
+                    advance_watermarks({shard["app_id"]: mark})
+    finally:
+        fingerprints.close()
+
+    if metrics is not None:
+        metrics.observe_limiters(limiter_stats())
+        metrics.observe_transport(pool_stats())
+    return counts
+
+def parse_locales(value):
+    """Parse "en:et,am:et" into [("en", "et"), ("am", "et")]"""
+    locales = []
+    for item in value.split(","):
+        lang, _, country = item.strip().partition(":")
+        if not lang or not country:
+            raise argparse.ArgumentTypeError(f"locale '{item}' is not in lang:country form")
+        locales.append((lang, country))
+    return locales
+
+def parse_sources(value):
+    """Parse "play,app_store" into a list of source names"""
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SOURCE_LABELS]
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"unknown source(s) {', '.join(unknown)}; expected some of {', '.join(SOURCE_LABELS)}"
         )
-        
-        for review in tqdm(reviews):
-            all_reviews.append({
-                "bank": bank_name,
-                "review": review.get("content", ""),
-                "rating": review.get("score", 0),
-                "date": review.get("at", "").strftime("%Y-%m-%d") if review.get("at") else "",
-                "source": "Google Play"
-            })
-            
-    return pd.DataFrame(all_reviews)
-
-def save_data(df):
-    df.to_csv("data/raw/reviews_raw.csv", index=False)
-    print(f"Saved {len(df)} reviews to data/raw/reviews_raw.csv")
+    return names
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scrape bank app reviews from Google Play")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS,
+                        help="number of apps scraped concurrently")
+    parser.add_argument("--per-app-concurrency", type=int, default=PER_APP_CONCURRENCY,
+                        help="maximum concurrent paging streams against one app")
+    parser.add_argument("--partition-by-rating", action="store_true",
+                        help="page each app as five parallel per-star-rating streams")
+    parser.add_argument("--locales", type=parse_locales, default=LOCALES,
+                        help="comma-separated lang:country pairs to scrape, e.g. en:et,am:et")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only fetch reviews newer than the stored watermark and add them to the raw store")
+    parser.add_argument("--sources", type=parse_sources, default=None,
+                        help=f"comma-separated review sources to scrape ({', '.join(SOURCE_LABELS)}; "
+                             "default: every source in the app registry)")
+    parser.add_argument("--skip-unchanged", action="store_true",
+                        help="incrementally scrape only apps whose store metadata (review counts, last update) changed")
+    parser.add_argument("--sample-pages", type=int, default=None, metavar="N",
+                        help=f"take a weighted snapshot of at most N pages per star rating and locale into {SAMPLE_DIR}")
+    parser.add_argument("--shared-budget", default=DEFAULT_BUDGET_PATH, metavar="PATH",
+                        help="host-wide rate budget file shared with every other scraper process")
+    parser.add_argument("--no-shared-budget", dest="shared_budget", action="store_const", const=None,
+                        help="limit only this process's own requests, ignoring the host-wide budget")
+    parser.add_argument("--shared-rate", type=float, default=2.0,
+                        help="initial requests/sec of the shared budget when it is first created")
+    parser.add_argument("--http-pool-size", type=int, default=DEFAULT_POOL_SIZE,
+                        help="keep-alive HTTPS connections shared by all apps (0 opens one per request)")
+    parser.add_argument("--library-decoder", action="store_true",
+                        help="decode pages with google_play_scraper.reviews() instead of the columnar decoder")
+    parser.add_argument("--record", metavar="DIR",
+                        help="save every fetched page as a fixture in DIR")
+    parser.add_argument("--replay", metavar="DIR",
+                        help="serve pages from fixtures in DIR instead of Google Play")
+    parser.add_argument("--replay-latency", type=float, default=0.0,
+                        help="mean simulated seconds per replayed page")
+    parser.add_argument("--replay-error-rate", type=float, default=0.0,
+                        help="probability that a replayed request fails with a 429/503")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="seed for replay latency and error injection")
+    parser.add_argument("--schedule", action="store_true",
+                        help="incrementally scrape only the apps the velocity scheduler picks")
+    parser.add_argument("--request-budget", type=int, default=100,
+                        help="estimated requests the scheduler may spend in one run")
+    parser.add_argument("--metrics-dir", default=METRICS_DIR,
+                        help="directory for the scraper.prom / scraper.json metrics export")
+    parser.add_argument("--enqueue", action="store_true",
+                        help="queue every app (per rating with --partition-by-rating) as shards for workers and exit")
+    parser.add_argument("--worker", action="store_true",
+                        help="incrementally scrape shards from the shared work queue until it is empty")
+    parser.add_argument("--queue-dir", default=WORK_QUEUE_DIR,
+                        help="work-queue directory, on a filesystem shared by every worker host")
+    parser.add_argument("--lease-seconds", type=int, default=LEASE_SECONDS,
+                        help="seconds before an unrenewed shard lease can be re-claimed")
+    return parser.parse_args()
+
+def make_backend(args):
+    if args.replay:
+        return ReplayBackend(args.replay, latency=args.replay_latency, jitter=True,
+                             error_rate=args.replay_error_rate, seed=args.seed)
+    live = (PlayBackend if args.library_decoder else FastPlayBackend)(args.http_pool_size)
+    if args.record:
+        return RecordingBackend(args.record, inner=live)
+    return live
+
+def source_locales(name, locales):
+    """Locales a source is paged in
+
+    App Store feeds are per country, so they get one locale per country;
+    local drops are read once.
+    """
+    if name == PLAY_SOURCE:
+        return locales
+    if name != APP_STORE_SOURCE:
+        return locales[:1]
+    per_country = []
+    for lang, country in locales:
+        if country not in {known_country for _, known_country in per_country}:
+            per_country.append((lang, country))
+    return per_country
+
+def plan_sources(sources, schedule_state, request_budget, locales, partition_by_rating=False, metadata_requests=0):
+    """Apps of every source the velocity scheduler picks, as {source: {name: app_id}}
+
+    Apps are planned under their app_key, and each source gets the whole
+    request_budget since every source is rate limited on its own.
+    """
+    due = {}
+    for name, apps in sources.items():
+        streams = len(source_locales(name, locales))
+        if name == PLAY_SOURCE and partition_by_rating:
+            streams *= len(SCORES)
+        page_size = APP_STORE_PAGE_SIZE if name == APP_STORE_SOURCE else PAGE_SIZE
+        keys = {bank_name: app_key(name, app_id) for bank_name, app_id in apps.items()}
+        planned = plan_scrape(keys, schedule_state, request_budget, page_size, streams, metadata_requests)
+        due[name] = {bank_name: apps[bank_name] for bank_name in planned}
+    return due
+
+def make_sources(args, sources):
+    """Connectors of the registry's non-Play sources selected by --sources"""
+    connectors = []
+    for name, apps in sources.items():
+        if name == PLAY_SOURCE or not apps or (args.sources and name not in args.sources):
+            continue
+        backend = None
+        if args.replay:
+            backend = ReplayBackend(args.replay, latency=args.replay_latency, jitter=True,
+                                    error_rate=args.replay_error_rate, seed=args.seed)
+        elif args.record:
+            backend = RecordingBackend(args.record, inner=default_backend(name))
+        connectors.append(make_connector(name, apps, backend, source_locales(name, args.locales)))
+    return connectors
 
 if __name__ == "__main__":
-    reviews_df = scrape_reviews()
-    save_data(reviews_df)
\ No newline at end of file
+    args = parse_args()
+    apps = BANK_APPS if not args.sources or PLAY_SOURCE in args.sources else {}
+    sources = load_sources()
+    if args.schedule:
+        args.incremental = True
+        schedule_state = load_schedule_state()
+        sources = plan_sources(sources, schedule_state, args.request_budget, args.locales, args.partition_by_rating,
+                               metadata_requests=1 if args.skip_unchanged else 0)
+        apps = sources.get(PLAY_SOURCE, {}) if apps else {}
+        for name, due in sources.items():
+            if not args.sources or name in args.sources:
+                print(f"Scheduled {len(due)} {SOURCE_LABELS.get(name, name)} apps: {', '.join(due) or 'none due'}")
+    if args.skip_unchanged:
+        args.incremental = True
+    if args.sources and not (args.incremental or args.enqueue or args.worker or args.sample_pages):
+        skipped = set(sources) - set(args.sources)
+        if skipped:
+            raise SystemExit(f"A full scrape replaces the whole raw store, including {', '.join(sorted(skipped))} "
+                             "reviews; add those sources to --sources or use --incremental")
+
+    limiter_factory = host_limiter_factory(args.shared_budget, args.shared_rate)
+    metrics = ScrapeMetrics()
+    queue = WorkQueue(args.queue_dir, lease_seconds=args.lease_seconds) if args.enqueue or args.worker else None
+
+    if args.enqueue:
+        added = enqueue_apps(queue, apps, args.partition_by_rating)
+        print(f"Queued {added} shards in {args.queue_dir}: {queue.status()}")
+    elif args.worker:
+        counts = run_worker(
+            queue,
+            per_app_concurrency=args.per_app_concurrency,
+            limiter_factory=limiter_factory,
+            locales=args.locales,
+            backend=make_backend(args),
+            metrics=metrics
+        )
+        metrics.export(args.metrics_dir)
+        print(f"Worker finished with {sum(counts.values())} reviews; queue is now {queue.status()}")
+    elif args.sample_pages:
+        sample_dir, sink, weights = run_sample(
+            apps,
+            args.sample_pages,
+            max_workers=args.workers,
+            per_app_concurrency=args.per_app_concurrency,
+            limiter_factory=limiter_factory,
+            locales=args.locales,
+            backend=make_backend(args),
+            metrics=metrics
+        )
+        metrics.export(args.metrics_dir)
+        print(f"Sampled {sink.rows} reviews of {len(weights)} apps into {sample_dir}")
+    else:
+        sink, counts = run_scrape(
+            apps,
+            incremental=args.incremental,
+            skip_unchanged=args.skip_unchanged,
+            sources=make_sources(args, sources),
+            max_workers=args.workers,
+            per_app_concurrency=args.per_app_concurrency,
+            limiter_factory=limiter_factory,
+            partition_by_rating=args.partition_by_rating,
+            locales=args.locales,
+            backend=make_backend(args),
+            metrics=metrics
+        )
+        metrics.export(args.metrics_dir)
+        print(f"Wrote {sink.rows} new and {sink.changed_rows} edited reviews to {len(sink.files)} part files")
+        print(f"Compacted away {compact_raw_store()} small part files")
+
+    if args.schedule and not (args.enqueue or args.sample_pages):
+        for app_id, written in counts.items():
+            record_scrape(schedule_state, app_id, written)
+        save_schedule_state(schedule_state)
@@ -0,0 +1,179 @@
+# scripts/seen_filter.py
+from contextlib import contextmanager
+from pathlib import Path
+import hashlib
+import math
+import os
+import struct
+import threading
+from page_decoder import page_column
+
+try:
+    import fcntl
+except ImportError:  # Windows has no flock; concurrent saves then keep the last writer's filter
+    fcntl = None
+
+SEEN_FILTER_PATH = "data/raw/seen_reviews.bloom"
+
+# Sized for ~2M reviews at a 0.1% false-positive rate: about 3.6 MB on disk
+DEFAULT_CAPACITY = 2_000_000
+DEFAULT_ERROR_RATE = 0.001
+
+_HEADER = struct.Struct("<4sQIQ")
+_MAGIC = b"BLM1"
+
+class BloomFilter:
+    """Fixed-size Bloom filter over byte strings, persisted as a flat bit array
+
+    Membership tests can return false positives (at roughly error_rate once
+    capacity keys are added) but never false negatives.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, error_rate=DEFAULT_ERROR_RATE, bits=None, hashes=None):
+        self.bits = bits or max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = hashes or max(1, round(self.bits / capacity * math.log(2)))
+        self.count = 0
+        self._array = bytearray((self.bits + 7) // 8)
+        self._lock = threading.Lock()
+
+    @property
+    def capacity(self):
+        """Keys the filter holds before exceeding its design error rate"""
+        return int(self.bits * math.log(2) / self.hashes)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def add(self, key):
+        """Add a key; returns True if it was (probably) already present"""
+        positions = self._positions(key)
+        with self._lock:
+            present = all(self._array[p >> 3] & (1 << (p & 7)) for p in positions)
+            if not present:
+                for p in positions:
+                    self._array[p >> 3] |= 1 << (p & 7)
+                self.count += 1
+            return present
+
+    def __contains__(self, key):
+        positions = self._positions(key)
+        with self._lock:
+            return all(self._array[p >> 3] & (1 << (p & 7)) for p in positions)
+
+    def update(self, other):
+        """Add every key of another filter of the same size (a bitwise OR)"""
+        if (other.bits, other.hashes) != (self.bits, self.hashes):
+            raise ValueError("only Bloom filters of the same size and hash count can be merged")
+        with self._lock:
+            merged = int.from_bytes(self._array, "little") | int.from_bytes(other._array, "little")
+            self._array = bytearray(merged.to_bytes(len(self._array), "little"))
+            # The union's key count is estimated from the share of bits set
+            filled = min(merged.bit_count() / self.bits, 1 - 1 / self.bits)
+            self.count = max(self.count, other.count, round(-self.bits / self.hashes * math.log(1 - filled)))
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.parent / f".{path.name}.tmp"
+        with self._lock, open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, self.bits, self.hashes, self.count))
+            f.write(self._array)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            magic, bits, hashes, count = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != _MAGIC:
+                raise ValueError(f"{path} is not a Bloom filter file")
+            bloom = cls(bits=bits, hashes=hashes)
+            bloom._array = bytearray(f.read())
+        bloom.count = count
+        return bloom
+
+def review_key(app_id, review_id=None, at=None, content=None):
+    """Filter key of a review: its reviewId, or a content hash without one
+
+    The content hash covers app, timestamp and text, so identical short
+    texts ("good app") from different users are not collapsed.
+    """
+    if review_id:
+        return f"id:{review_id}".encode("utf-8")
+    text = f"{app_id}|{at.isoformat() if at else ''}|{content or ''}"
+    return b"text:" + hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+class SeenReviewFilter:
+    """Persistent sketch of every review already ingested into the raw store
+
+    Used by incremental scrapes to drop known reviews before they reach
+    disk and to stop paging once a whole page is already known.
+    """
+
+    def __init__(self, path=SEEN_FILTER_PATH, bloom=None):
+        self.path = path
+        self.bloom = bloom or BloomFilter()
+
+    @classmethod
+    def open(cls, path=SEEN_FILTER_PATH, raw_root=None):
+        """Load the filter, rebuilding it from the raw store when missing"""
+        if os.path.exists(path):
+            return cls(path, BloomFilter.load(path))
+        if raw_root is None or not os.path.isdir(raw_root):
+            return cls(path)
+
+        from raw_store import iter_raw_chunks, raw_dataset
+        rows = raw_dataset(raw_root).count_rows()
+        # Leave room to double before the false-positive rate degrades
+        seen = cls(path, BloomFilter(capacity=max(DEFAULT_CAPACITY, 2 * rows)))
+        if rows:
+            for chunk in iter_raw_chunks(raw_root, columns=["app_id", "review_id", "at", "review"]):
+                for app_id, review_id, at, content in zip(chunk["app_id"], chunk["review_id"], chunk["at"], chunk["review"]):
+                    seen.bloom.add(review_key(app_id, review_id, at, content))
+        return seen
+
+    @staticmethod
+    def _keys(app_id, reviews):
+        return [
+            review_key(app_id, review_id, at, content)
+            for review_id, at, content in zip(
+                page_column(reviews, "reviewId"), page_column(reviews, "at"), page_column(reviews, "content")
+            )
+        ]
+
+    def known_flags(self, app_id, reviews):
+        """Whether each review (of a ReviewPage or list of dicts) is probably already ingested"""
+        return [key in self.bloom for key in self._keys(app_id, reviews)]
+
+    def add(self, app_id, reviews):
+        for key in self._keys(app_id, reviews):
+            self.bloom.add(key)
+
+    @contextmanager
+    def _locked(self):
+        if fcntl is None:
+            yield
+            return
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        with open(f"{self.path}.lock", "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def save(self):
+        """Persist the filter, merged with keys other processes saved since it was opened"""
+        with self._locked():
+            if os.path.exists(self.path):
+                on_disk = BloomFilter.load(self.path)
+                if (on_disk.bits, on_disk.hashes) == (self.bloom.bits, self.bloom.hashes):
+                    self.bloom.update(on_disk)
+            if self.bloom.count > self.bloom.capacity:
+                print(f"Warning: seen-review filter holds {self.bloom.count} keys, above its "
+                      f"{self.bloom.capacity} capacity; delete {self.path} to rebuild it larger")
+            self.bloom.save(self.path)
@@ -0,0 +1,261 @@
+# scripts/source_connectors.py
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+from urllib.error import HTTPError
+import csv
+import hashlib
+import json
+import threading
+from app_metadata import signature
+from app_registry import DEFAULT_SOURCE
+from http_pool import HTTPConnectionPool
+from rate_limiter import RateBudget, TokenBucketLimiter
+
+# Registry "source" of each connector, and the value written to the raw store's source column
+PLAY_SOURCE = DEFAULT_SOURCE
+APP_STORE_SOURCE = "app_store"
+LOCAL_SOURCE = "local"
+SOURCE_LABELS = {PLAY_SOURCE: "Google Play", APP_STORE_SOURCE: "App Store", LOCAL_SOURCE: "Local drop"}
+
+# Per-source limits: apps scraped at once, streams per app, initial/maximum
+# requests/sec per app, and requests/sec across the whole source
+SOURCE_LIMITS = {
+    APP_STORE_SOURCE: {"max_workers": 4, "per_app_concurrency": 1, "rate": 0.5, "max_rate": 2.0, "source_rate": 2.0},
+    LOCAL_SOURCE: {"max_workers": 2, "per_app_concurrency": 1, "rate": 1000.0, "max_rate": 1000.0, "source_rate": None},
+}
+
+# Apple's customer-review feed: 50 reviews per page, at most 10 pages per app and country
+APP_STORE_FEED_URL = "https://itunes.apple.com/{country}/rss/customerreviews/page={page}/id={app_id}/sortby=mostrecent/json"
+APP_STORE_LOOKUP_URL = "https://itunes.apple.com/lookup?id={app_id}&country={country}"
+APP_STORE_MAX_PAGES = 10
+APP_STORE_PAGE_SIZE = 50
+
+# Reviews exported as JSONL or CSV files into DROP_DIR/<app_id>/
+DROP_DIR = "data/drops"
+DROP_PATTERNS = ("*.jsonl", "*.csv")
+# Raw-store column names accepted in drop files, mapped to the review fields every backend returns
+DROP_FIELD_ALIASES = {
+    "review_id": "reviewId",
+    "review": "content",
+    "rating": "score",
+    "date": "at",
+    "thumbs_up": "thumbsUpCount",
+    "review_created_version": "reviewCreatedVersion",
+    "reply_content": "replyContent",
+    "replied_at": "repliedAt",
+}
+
+def app_key(source, app_id):
+    """Key of an app's scrape state (watermark, checkpoints, limiter, counts)
+
+    The same app id may be registered under several sources, e.g. a local
+    drop of a Play app's export, so apps of other sources are keyed by
+    source too; Play apps keep their bare app id.
+    """
+    return app_id if source == PLAY_SOURCE else f"{source}/{app_id}"
+
+class SourceConnector:
+    """One review source: its fetch backend, its apps and how hard it may be driven
+
+    The backend follows the fetch_backends interface (fetch_page and
+    fetch_app_metadata returning Play-style review fields), so every source
+    runs through the same streaming scrape, deduplication, checkpoints and
+    sink as Google Play. Each connector has its own app concurrency
+    (max_workers), streams per app and per-app limiters from
+    limiter_factory; sources without a star-rating filter are never split
+    into rating streams. Sources that can gain reviews older than the ones
+    already ingested (stops_at_watermark=False) are paged to the end on
+    incremental runs and deduplicated against the raw store instead.
+    """
+
+    def __init__(self, name, apps, backend, label=None, locales=None, max_workers=4, per_app_concurrency=1,
+                 limiter_factory=TokenBucketLimiter, supports_score_filter=True, stops_at_watermark=True):
+        self.name = name
+        self.apps = apps
+        self.backend = backend
+        self.label = label or SOURCE_LABELS.get(name, name)
+        self.locales = locales
+        self.max_workers = max_workers
+        self.per_app_concurrency = per_app_concurrency
+        self.limiter_factory = limiter_factory
+        self.supports_score_filter = supports_score_filter
+        self.stops_at_watermark = stops_at_watermark
+
+def source_limiter_factory(rate, max_rate, source_rate=None):
+    """Per-app TokenBucketLimiter factory drawing from one budget for the whole source"""
+    budget = RateBudget(rate=source_rate, burst=1, max_rate=source_rate) if source_rate else None
+    return partial(TokenBucketLimiter, rate=rate, max_rate=max_rate, budget=budget)
+
+def _fetch_json(pool, url):
+    status, body = pool.request("GET", url)
+    if status >= 400:
+        # Carries the status like urllib's, so throttles are retried by the limiter
+        raise HTTPError(url, status, f"Status code {status} returned.", None, None)
+    return json.loads(body)
+
+def _label(entry, key):
+    value = entry.get(key)
+    return value.get("label") if isinstance(value, dict) else None
+
+class AppStoreBackend:
+    """iOS App Store reviews from Apple's public customer-review RSS feed
+
+    The feed serves the newest 500 reviews per app and country, 50 per page,
+    with no star-rating filter; lang is only recorded. Requests share one
+    keep-alive connection pool.
+    """
+
+    def __init__(self, pool_size=4):
+        self.pool = HTTPConnectionPool(pool_size)
+
+    @staticmethod
+    def _review(entry):
+        at = _label(entry, "updated")
+        return {
+            "reviewId": _label(entry, "id"),
+            "content": _label(entry, "content"),
+            "score": int(_label(entry, "im:rating")),
+            "thumbsUpCount": int(_label(entry, "im:voteCount") or 0),
+            "reviewCreatedVersion": _label(entry, "im:version"),
+            # Naive local time, like Play's review timestamps
+            "at": datetime.fromisoformat(at).astimezone().replace(tzinfo=None) if at else None,
+            "replyContent": None,
+            "repliedAt": None,
+        }
+
+    def fetch_page(self, app_id, lang, country, score, count, token=None):
+        page_number = int(token["token"]) if token else 1
+        feed = _fetch_json(self.pool, APP_STORE_FEED_URL.format(country=country, page=page_number, app_id=app_id))
+        entries = feed.get("feed", {}).get("entry") or []
+        if isinstance(entries, dict):
+            # A single review is not wrapped in a list
+            entries = [entries]
+        # Older feeds lead with an entry describing the app itself, which has no rating
+        page = [self._review(entry) for entry in entries if "im:rating" in entry]
+        if score is not None:
+            page = [review for review in page if review["score"] == score]
+        next_token = None
+        if entries and page_number < APP_STORE_MAX_PAGES:
+            next_token = {"token": str(page_number + 1)}
+        return page, next_token
+
+    def fetch_app_metadata(self, app_id, lang, country):
+        results = _fetch_json(self.pool, APP_STORE_LOOKUP_URL.format(app_id=app_id, country=country)).get("results")
+        details = results[0] if results else {}
+        return signature({
+            "ratings": details.get("userRatingCount"),
+            "updated": details.get("currentVersionReleaseDate"),
+            "version": details.get("version"),
+        })
+
+def _parse_datetime(value):
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value))
+
+def _drop_review(row):
+    if "at" in row:
+        # A full timestamp beats the day-only date column
+        row = {key: value for key, value in row.items() if key != "date"}
+    review = {DROP_FIELD_ALIASES.get(key, key): value for key, value in row.items()}
+    review["at"] = _parse_datetime(review.get("at"))
+    review["repliedAt"] = _parse_datetime(review.get("repliedAt"))
+    review["score"] = int(review["score"]) if review.get("score") not in (None, "") else None
+    review["thumbsUpCount"] = int(review["thumbsUpCount"]) if review.get("thumbsUpCount") not in (None, "") else None
+    for field in ("content", "reviewCreatedVersion", "replyContent"):
+        if review.get(field) == "":
+            review[field] = None
+    if not review.get("reviewId"):
+        # Stable id for exports without one, so reruns deduplicate
+        key = f"{review.get('content')}|{review['at']}|{review['score']}"
+        review["reviewId"] = "drop-" + hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]
+    return review
+
+class LocalDropBackend:
+    """Reviews exported as JSONL or CSV files into root/<app_id>/
+
+    Rows use either Play's review field names or the raw store's column
+    names (review_id, review, rating, at or date, ...). All files of an app
+    are served as one newest-first stream, re-read whenever a file is added
+    or changed. A new file may hold reviews older than the app's watermark
+    (a backfill export), so its connector pages the whole stream on every
+    run and relies on deduplication against the raw store.
+    """
+
+    def __init__(self, root=DROP_DIR):
+        self.root = Path(root)
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def _files(self, app_id):
+        return sorted(path for pattern in DROP_PATTERNS for path in (self.root / app_id).glob(pattern))
+
+    @staticmethod
+    def _listing(files):
+        return tuple((path.name, path.stat().st_size, path.stat().st_mtime_ns) for path in files)
+
+    def _reviews(self, app_id):
+        files = self._files(app_id)
+        listing = self._listing(files)
+        with self._lock:
+            cached = self._cache.get(app_id)
+            if cached is not None and cached[0] == listing:
+                return cached[1]
+
+        reviews = []
+        for path in files:
+            with open(path, encoding="utf-8", newline="") as f:
+                if path.suffix == ".csv":
+                    rows = csv.DictReader(f)
+                else:
+                    rows = (json.loads(line) for line in f if line.strip())
+                reviews.extend(_drop_review(row) for row in rows)
+        reviews.sort(key=lambda review: review["at"] or datetime.min, reverse=True)
+        with self._lock:
+            self._cache[app_id] = (listing, reviews)
+        return reviews
+
+    def fetch_page(self, app_id, lang, country, score, count, token=None):
+        reviews = self._reviews(app_id)
+        if score is not None:
+            reviews = [review for review in reviews if review["score"] == score]
+        start = int(token["token"]) if token else 0
+        end = start + count
+        return reviews[start:end], {"token": str(end)} if end < len(reviews) else None
+
+    def fetch_app_metadata(self, app_id, lang, country):
+        listing = self._listing(self._files(app_id))
+        return signature({
+            "updated": max((mtime for _, _, mtime in listing), default=None),
+            # Changes whenever a drop file is added, replaced or grows
+            "version": hashlib.sha1(repr(listing).encode("utf-8")).hexdigest(),
+        })
+
+def default_backend(name):
+    """Live backend of a non-Play source"""
+    if name == APP_STORE_SOURCE:
+        return AppStoreBackend(SOURCE_LIMITS[name]["max_workers"])
+    return LocalDropBackend()
+
+def make_connector(name, apps, backend=None, locales=None):
+    """Connector of a non-Play source with its SOURCE_LIMITS
+
+    backend overrides the source's own backend, e.g. with a ReplayBackend.
+    """
+    if name not in SOURCE_LIMITS:
+        raise ValueError(f"Unknown review source '{name}'; expected one of {', '.join(SOURCE_LABELS)}")
+    limits = SOURCE_LIMITS[name]
+    return SourceConnector(
+        name,
+        apps,
+        backend or default_backend(name),
+        locales=locales,
+        max_workers=limits["max_workers"],
+        per_app_concurrency=limits["per_app_concurrency"],
+        limiter_factory=source_limiter_factory(limits["rate"], limits["max_rate"], limits["source_rate"]),
+        supports_score_filter=name != APP_STORE_SOURCE,
+        stops_at_watermark=name != LOCAL_SOURCE,
+    )
@@ -0,0 +1,196 @@
+# scripts/work_queue.py
+from contextlib import contextmanager
+from pathlib import Path
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+
+WORK_QUEUE_DIR = "data/raw/queue"
+
+# Seconds a claimed shard stays leased without a renewal
+LEASE_SECONDS = 300
+# Leases are renewed this many times per lease period while work is running
+RENEWALS_PER_LEASE = 3
+
+STATES = ("pending", "leased", "done")
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+def _write_json(path, payload):
+    tmp_path = path.parent / f".{path.name}.{uuid.uuid4().hex[:8]}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+class Lease:
+    """A shard claimed by one worker, valid while its file stays in leased/"""
+
+    def __init__(self, shard_id, shard, path, worker_id):
+        self.shard_id = shard_id
+        self.shard = shard
+        self.path = path
+        self.worker_id = worker_id
+        self.lost = threading.Event()
+
+class WorkQueue:
+    """Lease-based work queue kept in a directory on a shared filesystem
+
+    Every shard is one small JSON file that moves between pending/, leased/
+    and done/ by atomic rename, so workers on different hosts coordinate
+    without a broker: exactly one rename of a pending file succeeds, and the
+    winner owns the shard. A leased file is named after its worker and its
+    mtime is the lease's last renewal; leases not renewed for lease_seconds
+    are moved back to pending/ by whichever worker notices first. Lease
+    expiry compares mtimes with the local clock, so hosts should be kept
+    within a small fraction of lease_seconds of each other.
+    """
+
+    def __init__(self, root=WORK_QUEUE_DIR, lease_seconds=LEASE_SECONDS):
+        self.root = Path(root)
+        self.lease_seconds = lease_seconds
+        for state in STATES:
+            (self.root / state).mkdir(parents=True, exist_ok=True)
+
+    def _dir(self, state):
+        return self.root / state
+
+    @staticmethod
+    def _leased_name(shard_id, worker_id):
+        return f"{shard_id}@{worker_id}.json"
+
+    @staticmethod
+    def _shard_id_of(path):
+        return path.name[:-len(".json")].split("@", 1)[0]
+
+    def _known_ids(self):
+        return {self._shard_id_of(path) for state in STATES for path in self._dir(state).glob("*.json")}
+
+    def enqueue(self, shards):
+        """Add {shard_id: shard} entries not already pending, leased or done
+
+        Returns the number of shards added.
+        """
+        known = self._known_ids()
+        added = 0
+        for shard_id, shard in shards.items():
+            if shard_id in known:
+                continue
+            _write_json(self._dir("pending") / f"{shard_id}.json", {"shard_id": shard_id, "shard": shard})
+            added += 1
+        return added
+
+    def reclaim_expired(self):
+        """Move leases not renewed within lease_seconds back to pending/"""
+        reclaimed = 0
+        cutoff = time.time() - self.lease_seconds
+        for path in self._dir("leased").glob("*.json"):
+            try:
+                if path.stat().st_mtime >= cutoff:
+                    continue
+                os.rename(path, self._dir("pending") / f"{self._shard_id_of(path)}.json")
+                reclaimed += 1
+            except FileNotFoundError:
+                # Renewed away, completed or reclaimed by another worker meanwhile
+                continue
+        return reclaimed
+
+    def claim(self, worker_id):
+        """Lease the next pending shard, or return None when nothing is pending"""
+        self.reclaim_expired()
+        for path in sorted(self._dir("pending").glob("*.json")):
+            shard_id = self._shard_id_of(path)
+            leased_path = self._dir("leased") / self._leased_name(shard_id, worker_id)
+            try:
+                # Touch first: rename keeps the mtime, which is the lease start
+                os.utime(path)
+                os.rename(path, leased_path)
+            except FileNotFoundError:
+                continue
+            with open(leased_path, encoding="utf-8") as f:
+                payload = json.load(f)
+            return Lease(shard_id, payload["shard"], leased_path, worker_id)
+        return None
+
+    def renew(self, lease):
+        """Extend a lease; False once it has expired and been reclaimed"""
+        try:
+            os.utime(lease.path)
+            return True
+        except FileNotFoundError:
+            lease.lost.set()
+            return False
+
+    @contextmanager
+    def keep_alive(self, lease):
+        """Renew the lease in the background while the block runs"""
+        stop = threading.Event()
+
+        def renew_loop():
+            while not stop.wait(self.lease_seconds / RENEWALS_PER_LEASE):
+                if not self.renew(lease):
+                    return
+
+        thread = threading.Thread(target=renew_loop, name=f"lease-{lease.shard_id}", daemon=True)
+        thread.start()
+        try:
+            yield lease
+        finally:
+            stop.set()
+            thread.join()
+
+    def complete(self, lease, result=None):
+        """Mark a leased shard done, recording result; False if the lease was lost"""
+        try:
+            os.rename(lease.path, self._dir("done") / f"{lease.shard_id}.json")
+        except FileNotFoundError:
+            lease.lost.set()
+            return False
+        _write_json(
+            self._dir("done") / f"{lease.shard_id}.json",
+            {"shard_id": lease.shard_id, "shard": lease.shard, "worker": lease.worker_id,
+             "finished_at": time.time(), "result": result}
+        )
+        return True
+
+    def release(self, lease):
+        """Hand a leased shard back to pending/ after a failure"""
+        try:
+            os.rename(lease.path, self._dir("pending") / f"{lease.shard_id}.json")
+            return True
+        except FileNotFoundError:
+            lease.lost.set()
+            return False
+
+    def finished(self, shard_ids):
+        """Done records of every shard in shard_ids, or None while any is not yet done"""
+        records = []
+        for shard_id in shard_ids:
+            try:
+                with open(self._dir("done") / f"{shard_id}.json", encoding="utf-8") as f:
+                    record = json.load(f)
+            except FileNotFoundError:
+                return None
+            # complete() renames first and writes the result second
+            if "finished_at" not in record:
+                return None
+            records.append(record)
+        return records
+
+    def drain_done(self):
+        """Return and remove the records of every completed shard"""
+        records = []
+        for path in sorted(self._dir("done").glob("*.json")):
+            with open(path, encoding="utf-8") as f:
+                records.append(json.load(f))
+            path.unlink()
+        return records
+
+    def status(self):
+        """Number of shards in each state"""
+        return {state: len(list(self._dir(state).glob("*.json"))) for state in STATES}